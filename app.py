@@ -1,250 +1,220 @@
 import flet as ft
-from gtts import gTTS
+import argparse
+import audioop
 import os
-import pygame
+import shutil
 import speech_recognition as sr
-from deep_translator import GoogleTranslator
+import tempfile
 import time
-import nltk
-from nltk.tokenize import word_tokenize
-from pydub import AudioSegment
-import noisereduce as nr
-import librosa
-import soundfile as sf
-from langdetect import detect  # Language detection
 import sqlite3
-from history import setup_history_database, add_translation_to_history, get_user_history, group_history_by_date
-
-
-# Database setup for users and history
-def setup_database():
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-
-    # Create users table if it doesn't exist
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        email TEXT NOT NULL UNIQUE,
-        password TEXT NOT NULL
-    )
-    ''')
-
-    # Create history table with all necessary columns
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS history (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        input_text TEXT NOT NULL,
-        translated_text TEXT NOT NULL,
-        source_lang TEXT NOT NULL,
-        target_lang TEXT NOT NULL,
-        conversion_type TEXT NOT NULL,
-        user_id INTEGER NOT NULL,
-        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (user_id) REFERENCES users(id)
-    )
-    ''')
-
-    conn.commit()
-    conn.close()
-    
-def upgrade_history_table():
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-
-    # Check if the history table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='history'")
-    if c.fetchone() is not None:
-        # Create a new temporary table with the correct schema
-        c.execute('''
-        CREATE TABLE IF NOT EXISTS history_temp (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            input_text TEXT NOT NULL,
-            translated_text TEXT NOT NULL,
-            source_lang TEXT NOT NULL,
-            target_lang TEXT NOT NULL,
-            conversion_type TEXT NOT NULL,
-            user_id INTEGER NOT NULL,
-            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # Copy data from old history table to new one (excluding missing columns)
-        c.execute('''
-        INSERT INTO history_temp (input_text, translated_text, source_lang, target_lang, user_id)
-        SELECT input_text, translated_text, source_lang, target_lang, user_id FROM history
-        ''')
-
-        # Drop old history table
-        c.execute("DROP TABLE history")
-
-        # Rename new table to original name
-        c.execute("ALTER TABLE history_temp RENAME TO history")
-
-    conn.commit()
-    conn.close()
-
-def get_user_id(user_name):
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE name = ?", (user_name,))
-    user_id = c.fetchone()
-    conn.close()
-    
-    return user_id[0] if user_id else None  # Return None if no ID found
+from concurrent.futures import TimeoutError as FutureTimeoutError
+# Heavy audio/NLP libraries (librosa, noisereduce, soundfile, pygame, nltk, langdetect)
+# are imported inside the functions that use them, so the first frame is not delayed.
+from translation_cache import translate_async, TRANSLATION_TIMEOUT
+from language_id import detect_language, preload as preload_language_profiles
+from tts_stream import split_sentences, stream_text_to_speech, synthesize_chunk, as_playable, init_mixer, stop_playback
+from jobs import JobQueueFull
+from transcription import recognizer as default_recognizer, FAILED_TRANSCRIPTION
+from segmentation import transcribe_segments, join_segments
+from streaming import StreamingTranscriber
+from calibration import prepare_recognizer, update_from_silence, recalibrate, load_profile, device_key
+from database import execute, fetchone, fetchall
+from metrics import span, start_metrics_server, enable_span_table, METRICS_PORT, PERSIST_SPANS
+from sessions import get_session_manager, configure_server, BrowserPlayer, TooManySessions
+from history import add_translation_to_history, get_user_history, group_history_by_date, get_user_history_page, search_history, setup_database, add_translation
+
+
+UPLOAD_DIR = None  # Where browsers upload recordings in server mode; see __main__
+UPLOAD_FORMATS = ["wav", "flac", "aif", "aiff"]  # Decoded without ffmpeg
+COMPRESSED_UPLOAD_FORMATS = ["mp3", "ogg", "m4a"]  # Decoded by pydub, which needs ffmpeg
+
+
+# Recording formats the server can decode; compressed ones only when ffmpeg is installed
+def upload_formats():
+    if shutil.which("ffmpeg") or shutil.which("avconv"):
+        return UPLOAD_FORMATS + COMPRESSED_UPLOAD_FORMATS
+    return UPLOAD_FORMATS
 
 
 # Function to add a user to the database
 def add_user(name, email, password):
     try:
-        conn = sqlite3.connect("users_and_history.db")
-        c = conn.cursor()
-        c.execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (name, email, password))
-        conn.commit()
-        conn.close()
+        execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (name, email, password))
         return True
     except sqlite3.IntegrityError:  # Email already exists
         return False
 
 # Function to validate login credentials
 def validate_login(email, password):
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute("SELECT name, password FROM users WHERE email = ?", (email,))
-    user = c.fetchone()
-    conn.close()
+    user = fetchone("SELECT name, password, id FROM users WHERE email = ?", (email,))
     
     if user and user[1] == password:
-        return user[0]  # Return the user's name if login is successful
+        return user[0], user[2]  # Return the user's name and ID if login is successful
     else:
         return None
 
-# Function to add a translation to history
-def add_translation(input_text, translated_text, source_lang, target_lang, conversion_type, user_id):
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO history (input_text, translated_text, source_lang, target_lang, conversion_type, user_id) VALUES (?, ?, ?, ?, ?, ?)",
-              (input_text, translated_text, source_lang, target_lang, conversion_type, user_id))
-    conn.commit()
-    conn.close()
-
 # Fetch translation history
 def get_history():
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM history ORDER BY id DESC")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    return fetchall("SELECT * FROM history ORDER BY id DESC")
 
-# Initialize recognizer and pygame for playing audio
-recognizer = sr.Recognizer()
-pygame.mixer.init()
-
-nltk.download('punkt', quiet=True)
-
-# Function to play audio
-def play_audio(audio_file):
-    try:
-        pygame.mixer.music.load(audio_file)
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            continue
-        pygame.mixer.music.stop()
-    except Exception as ex:
-        print(f"Audio playback error: {ex}")
-
-# Function to safely remove a file
-def safe_remove(file_path):
-    try:
-        os.remove(file_path)
-    except PermissionError:
-        time.sleep(0.1)
+# Function to play audio from a file path, or from mp3 bytes held in memory
+# The pygame mixer is started on first use.
+def play_audio(audio):
+    with span("playback") as s:
+        try:
+            pygame = init_mixer()
+            pygame.mixer.music.load(as_playable(audio), "mp3")
+            pygame.mixer.music.play()
+            while pygame.mixer.music.get_busy():
+                time.sleep(0.05)  # Yield the CPU while the track plays
+            pygame.mixer.music.stop()
+        except Exception as ex:
+            s.outcome = "error"
+            print(f"Audio playback error: {ex}")
 
 # Function to reduce noise in an audio file
-def reduce_noise(file_path, output_path):
-    print("Reducing noise in audio...")
-    try:
-        audio_data, sample_rate = librosa.load(file_path, sr=None)
-        reduced_noise_audio = nr.reduce_noise(y=audio_data, sr=sample_rate)
-        sf.write(output_path, reduced_noise_audio, sample_rate)
-        print("Noise reduction complete.")
-        return output_path
-    except Exception as ex:
-        print(f"Error reducing noise: {ex}")
-        return file_path
+# With a calibration profile, its recorded background noise is used as the noise estimate.
+def reduce_noise(file_path, output_path, noise_profile=None):
+    import librosa
+    import noisereduce as nr
+    import soundfile as sf
 
-# Function to record audio from the microphone and save to a file
-def record_audio_to_file(page, output_text, filename="train_announcement.wav", mic_index=None):
+    print("Reducing noise in audio...")
+    with span("noise_reduction") as s:
+        try:
+            audio_data, sample_rate = librosa.load(file_path, sr=None)
+            s.size = audio_data.nbytes
+            if noise_profile is not None and noise_profile.noise_clip and noise_profile.sample_rate == sample_rate:
+                reduced_noise_audio = nr.reduce_noise(y=audio_data, sr=sample_rate, y_noise=noise_profile.noise_samples())
+            else:
+                reduced_noise_audio = nr.reduce_noise(y=audio_data, sr=sample_rate)
+            sf.write(output_path, reduced_noise_audio, sample_rate)
+            print("Noise reduction complete.")
+            return output_path
+        except Exception as ex:
+            s.outcome = "error"
+            print(f"Error reducing noise: {ex}")
+            return file_path
+
+# Optional pipeline step: denoise a recording with the microphone's calibrated noise profile.
+# Works on captured sr.AudioData in memory, or on a file path (writing <name>_denoised.wav).
+# Returns the input unchanged when there is no noise profile yet, or when the profile was
+# recorded at another sample rate (its thresholds would gate the wrong frequencies).
+def denoise_recording(audio, mic_index=None, report=print):
+    import soundfile as sf
+    from denoise import denoise_file, denoise_audio_data, noise_threshold
+
+    profile = load_profile(device_key(mic_index))
+    if profile is None or not profile.noise_clip:
+        report("No noise profile available; skipping noise reduction.")
+        return audio
+    sample_rate = audio.sample_rate if isinstance(audio, sr.AudioData) else sf.info(audio).samplerate
+    if sample_rate != profile.sample_rate:
+        report(f"Noise profile is for {profile.sample_rate} Hz audio, not {sample_rate} Hz; skipping noise reduction.")
+        return audio
+    with span("noise_reduction") as s:
+        threshold = noise_threshold(profile.noise_samples())
+        if isinstance(audio, sr.AudioData):
+            s.size = len(audio.frame_data)
+            return denoise_audio_data(audio, threshold)
+        root, ext = os.path.splitext(audio)
+        return denoise_file(audio, f"{root}_denoised{ext}", threshold)
+
+# Function to record audio from the microphone into memory
+# Progress messages go to report(). When stop_event is given, capture runs until
+# it is set (or the 60 s limit) instead of waiting for the phrase to end.
+# The microphone's stored calibration profile is reused, so capture starts right away.
+# Pass the session's recognizer so concurrent sessions keep separate energy thresholds.
+def record_audio(report, mic_index=None, stop_event=None, recognizer=None):
+    recognizer = recognizer or default_recognizer
     try:
         mic = sr.Microphone(device_index=mic_index) if mic_index is not None else sr.Microphone()
         with mic as source:
-            output_text.value = "Adjusting for ambient noise, please wait..."
-            page.update()  # Update the output field in real-time
-            recognizer.adjust_for_ambient_noise(source, duration=5)
-            output_text.value = f"Energy threshold: {recognizer.energy_threshold}\nListening... Please speak."
-            page.update()
-            audio = recognizer.listen(source, timeout=15, phrase_time_limit=60)
-            with open(filename, "wb") as f:
-                f.write(audio.get_wav_data())
-            output_text.value = f"Audio saved to '{filename}'."
-            return filename
+            prepare_recognizer(recognizer, source, mic_index, report=report)
+            if stop_event is not None and stop_event.is_set():
+                report("Recording cancelled.")
+                return None
+            report(f"Energy threshold: {recognizer.energy_threshold}\nListening... Please speak.")
+            with span("capture") as s:
+                if stop_event is None:
+                    try:
+                        audio = recognizer.listen(source, timeout=15, phrase_time_limit=60)
+                    except sr.WaitTimeoutError:
+                        s.outcome = "timeout"
+                        raise
+                else:
+                    frames = []
+                    max_frames = int(60 * source.SAMPLE_RATE / source.CHUNK)
+                    while not stop_event.is_set() and len(frames) < max_frames:
+                        frames.append(source.stream.read(source.CHUNK))
+                    audio = sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    # Keep the calibration profile current with the quiet parts of this recording
+                    silent_frames = [f for f in frames if audioop.rms(f, source.SAMPLE_WIDTH) < recognizer.energy_threshold]
+                    update_from_silence(recognizer, mic_index, silent_frames, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                s.size = len(audio.frame_data)
+            report("Recording complete.")
+            return audio
     except sr.WaitTimeoutError:
-        output_text.value = "Listening timed out while waiting for a phrase."
+        report("Listening timed out while waiting for a phrase.")
         return None
     except Exception as ex:
-        output_text.value = f"Error while recording: {ex}"
+        report(f"Error while recording: {ex}")
         return None
 
-# Function to transcribe the audio file with retries and multilingual support
-def transcribe_audio_with_retries(audio_file_path, language=None, retries=3):
-    best_transcription = ""
-    best_token_count = 0
-
-    for attempt in range(retries):
-        print(f"Attempt {attempt + 1} to transcribe...")
-        try:
-            with sr.AudioFile(audio_file_path) as source:
-                audio_data = recognizer.record(source)
-                transcript = recognizer.recognize_google(audio_data, language=language) if language else recognizer.recognize_google(audio_data)
-                print(f"Transcription result: {transcript}")  # Log the result for debugging
-
-                # Calculate token count for accuracy (longer transcriptions usually more accurate)
-                token_count = len(transcript.split())
-                if token_count > best_token_count:
-                    best_token_count = token_count
-                    best_transcription = transcript
-
-            if best_transcription:
-                print(f"Best transcription so far: {best_transcription}")
-            else:
-                print(f"Attempt {attempt + 1} failed to improve transcription.")
-        except sr.UnknownValueError:
-            print("Could not understand audio.")
-        except sr.RequestError as e:
-            print(f"Google API error: {e}")
-        except Exception as ex:
-            print(f"Listening failed: {ex}")
-
-    return best_transcription if best_transcription else "Could not understand audio after multiple attempts"
+# Function to record audio from the microphone and save to a file, for when a file is wanted
+# Without a filename a new temporary file is used, so concurrent recordings never collide.
+def record_audio_to_file(report, filename=None, mic_index=None, stop_event=None, recognizer=None):
+    audio = record_audio(report, mic_index, stop_event, recognizer)
+    if audio is None:
+        return None
+    if filename is None:
+        fd, filename = tempfile.mkstemp(prefix="recording-", suffix=".wav")
+        os.close(fd)
+    with open(filename, "wb") as f:
+        f.write(audio.get_wav_data())
+    report(f"Audio saved to '{filename}'.")
+    return filename
 
 # Function to process audio with language detection and translation to native script
-def process_audio_with_translation(page, audio_file_path, output_text, user_name):
-    transcript = transcribe_audio_with_retries(audio_file_path)
+# `audio` is captured sr.AudioData or a path to an audio file.
+# Long recordings are split on silence and the segments transcribed in parallel.
+# `language` is the spoken language's code when the user set one; None = detect it.
+def process_audio_with_translation(page, audio, output_text, user_id, cancel_event=None, denoise=False, language=None):
+    if denoise:
+        def report(message):
+            output_text.value += f"\n{message}"
+
+        audio = denoise_recording(audio, report=report)
+    segments = transcribe_segments(audio, language, cancel_event=cancel_event)
+    transcript = join_segments(segments) or FAILED_TRANSCRIPTION
     
+    if cancel_event is not None and cancel_event.is_set():
+        return transcript
+    if len(segments) > 1:
+        for segment in segments:
+            tag = f" ({segment['language']})" if segment.get("language") else ""
+            output_text.value += f"\n[{segment['start']:.1f}s - {segment['end']:.1f}s]{tag} {segment['text'] or '(unrecognized)'}"
+    return translate_transcript(transcript, output_text, user_id, language)
+
+# Detect the transcript's language and translate it to English, recording it in history
+# `language` is the code the recognizer was given, if any; detection is skipped then.
+def translate_transcript(transcript, output_text, user_id, language=None):
     if "Could not understand audio" not in transcript:
-        detected_lang = detect(transcript)
-        output_text.value += f"\nDetected language: {detected_lang}"
+        detected_lang = detect_language(transcript, hint=language)
+        output_text.value += f"\nDetected language: {detected_lang or 'unknown'}"
         
         # Translate to English if detected language is not English
         if detected_lang != 'en':
+            pending = translate_async(transcript, source='auto', target='en')
             try:
-                translated_transcript = GoogleTranslator(source='auto', target='en').translate(transcript)
+                with span("translation", size=len(transcript)):
+                    translated_transcript = pending.result(TRANSLATION_TIMEOUT)
                 output_text.value += f"\nTranscription in English: {translated_transcript}"
-                user_id = get_user_id(user_name)
-                add_translation(transcript, translated_transcript, detected_lang, 'en', 'speech_to_text', user_id)
+                add_translation(transcript, translated_transcript, detected_lang or 'und', 'en', 'speech_to_text', user_id)
                 return translated_transcript
+            except FutureTimeoutError:
+                output_text.value += "\nTranslation error: the translation service did not answer in time"
+                return transcript
             except Exception as e:
                 output_text.value += f"\nTranslation error: {e}"
                 return transcript
@@ -252,39 +222,71 @@ def process_audio_with_translation(page, audio_file_path, output_text, user_name
     return transcript
 
 # Text-to-Speech conversion
-def text_to_speech(text, lang):
+# Multi-sentence text is streamed sentence by sentence unless stream=False.
+# With a player (a session's BrowserPlayer) the speech plays in that user's browser.
+# A stream stops when cancel_event is set or stop_playback() is called.
+def text_to_speech(text, lang, stream=None, player=None, cancel_event=None):
     if text:
         try:
-            pygame.mixer.music.stop()
-            filename = f"text_{int(time.time())}.mp3"
-            tts = gTTS(text=text, lang=lang)
-            tts.save(filename)
-            play_audio(filename)
-            safe_remove(filename)
+            if player is not None:
+                player.stop()
+                player.speak(text, lang)
+                return
+            stop_playback()
+            if stream is None:
+                stream = len(split_sentences(text)) > 1
+            if stream:
+                stream_text_to_speech(text, lang, stop_event=cancel_event)
+                return
+            # Synthesize into memory only on a cache miss; repeated phrases come from the cache
+            play_audio(synthesize_chunk(text, lang))
         except Exception as ex:
             print(f"Text-to-speech error: {ex}")
 
 # Function to translate text and play in the translated language
-def translate_and_speak_text(tts_textbox, trans_langbox, tts_translated_text, page,user_name):
+def translate_and_speak_text(tts_textbox, trans_langbox, tts_translated_text, page,user_id, player=None, cancel_event=None):
     text = tts_textbox.value
     target_lang = trans_langbox.value
     if text and target_lang:
+        pending = translate_async(text, source='auto', target=target_lang)
         try:
-            translated_text = GoogleTranslator(source='auto', target=target_lang).translate(text)
+            with span("translation", size=len(text)):
+                translated_text = pending.result(TRANSLATION_TIMEOUT)
             tts_translated_text.value = f"Translated Text: {translated_text}"
             page.update()  # Update the page to reflect the new translated text
-            text_to_speech(translated_text, target_lang)
-            user_id = get_user_id(user_name)  # Retrieve user ID
+            text_to_speech(translated_text, target_lang, player=player, cancel_event=cancel_event)
             add_translation(text, translated_text, 'en', target_lang, 'text_to_speech', user_id)
+        except FutureTimeoutError:
+            tts_translated_text.value = "Translation error: the translation service did not answer in time"
+            page.update()
         except Exception as ex:
             tts_translated_text.value = f"Translation error: {ex}"
             page.update()
 
 # Main function for Flet app
 def main(page: ft.Page):
-    setup_database()  # Ensure database is set up correctly
-    upgrade_history_table()
+    setup_database()  # Apply pending schema migrations; nothing to do once current
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)  # Per-stage p50/p99 at http://127.0.0.1:9464/metrics.json
+    if PERSIST_SPANS:
+        enable_span_table()
+    # Each page is a session with its own recognizer, scratch directory and job quota;
+    # long-running work runs on the shared job pool, off the event handler thread
+    sessions = get_session_manager()
+    try:
+        session = sessions.open(page.session_id)
+    except TooManySessions as ex:
+        page.add(ft.Text(f"The server is busy: {ex}", size=20))
+        return
+    page.on_close = lambda e: sessions.close(session.id)
+    upload_picker = None
+    if page.web:
+        session.player = BrowserPlayer(page)  # Play speech in this user's browser, not on the server
+        if UPLOAD_DIR:
+            upload_picker = ft.FilePicker()
+            page.overlay.append(upload_picker)
     user_name = None  # Placeholder for the logged-in user's name
+    user_id = None  # The logged-in user's ID, kept for the session so it is looked up once
     right_panel_content = ft.Container()  # Placeholder for dynamic right panel content
 
     # Function to switch the right panel content based on feature selection
@@ -307,15 +309,37 @@ def main(page: ft.Page):
         snack_bar.open = True
         page.update()
 
+    # Refresh the page when a job ends, telling the user if it failed
+    def show_job_result(job):
+        if job.status == "failed":
+            show_snackbar(f"{job.name.capitalize()} failed: {job.error}", ft.colors.RED)
+        else:
+            page.update()
+
+    # Run fn(job) in the background; returns the Job, or None if too much work is queued
+    def run_job(name, fn, on_progress=None, on_done=None):
+        try:
+            return session.submit(name, fn, on_progress=on_progress, on_done=on_done or show_job_result)
+        except JobQueueFull as ex:
+            show_snackbar(str(ex), ft.colors.RED)
+            return None
+
+    def stop_audio():
+        if session.player is not None:
+            session.player.stop()
+        else:
+            stop_playback()
+
     # Login view
     def login_view():
         def login(e):
-            nonlocal user_name
+            nonlocal user_name, user_id
             email = email_field.value
             password = password_field.value
             user = validate_login(email, password)  # Validate from database
             if user:
-                user_name = user  # Set logged-in user's name
+                user_name, user_id = user  # Set logged-in user's name and ID
+                session.user_name, session.user_id = user
                 switch_view("home")
             else:
                 show_snackbar("Invalid email or password", ft.colors.RED)
@@ -410,7 +434,7 @@ def main(page: ft.Page):
                     ft.TextButton("Speech-to-Text", data="speech_to_text", on_click=select_feature, style=ft.ButtonStyle(color=ft.colors.WHITE)),
                     ft.TextButton("Text-to-Speech", data="text_to_speech", on_click=select_feature, style=ft.ButtonStyle(color=ft.colors.WHITE)),
                     ft.TextButton("History", data="history", on_click=select_feature, style=ft.ButtonStyle(color=ft.colors.WHITE)),
-                    ft.TextButton("Log out", on_click=lambda _: switch_view("login"), style=ft.ButtonStyle(color=ft.colors.RED))
+                    ft.TextButton("Log out", on_click=lambda _: log_out(), style=ft.ButtonStyle(color=ft.colors.RED))
                 ],
                 spacing=20,
                 alignment=ft.MainAxisAlignment.START,
@@ -437,35 +461,161 @@ def main(page: ft.Page):
         stt_textbox = ft.TextField(label="Recognized Speech", multiline=True, width=500, height=150)
         stt_translation = ft.TextField(label="Translated Speech", multiline=True, width=500, height=150)
         trans_langbox = ft.TextField(label="Enter target language code", width=250)
+        spoken_langbox = ft.TextField(label="Spoken language code (blank = detect)", width=250)
         output_text = ft.Text()
+        live_switch = ft.Switch(label="Live transcription", value=False)
+        denoise_switch = ft.Switch(label="Noise reduction", value=False)
+
+        record_job = None
+        active_jobs = []
+
+        def report(message):
+            output_text.value = message
+            page.update()
+
+        # The language the user says they speak, passed to the recognizers; None = detect
+        def spoken_language():
+            return (spoken_langbox.value or "").strip() or None
+
+        def track(job):
+            if job is not None:
+                active_jobs[:] = [j for j in active_jobs if not j.done] + [job]
+            return job
 
-        is_listening = False
         def start_listening(e):
-            nonlocal is_listening
-            if not is_listening:
-                audio_file_path = record_audio_to_file(page, output_text)  # Start recording
+            nonlocal record_job
+            if live_switch.value:
+                start_live_transcription()
+                return
+            if record_job is None or record_job.done:
+                record_job = track(run_job(
+                    "record",
+                    lambda job: record_audio(job.report, stop_event=job.cancel_event, recognizer=session.recognizer),
+                    on_progress=report,
+                ))
+
+        # Live mode: transcribe each utterance while still listening, streaming text into stt_textbox
+        def start_live_transcription():
+            nonlocal record_job
+            if record_job is not None and not record_job.done:
+                return
+
+            def show_partial(transcript):
+                stt_textbox.value = transcript
                 page.update()
-                is_listening = True
-            # Placeholder: Add actual code to start recording audio
+
+            def listen(job):
+                job.report("Listening live... Please speak.")
+                transcript = StreamingTranscriber(show_partial, language=spoken_language(), recognizer=session.recognizer).run(job.cancel_event)
+                stt_textbox.value = transcript
+                output_text.value = "Live transcription stopped."
+                return transcript
+
+            record_job = track(run_job("live", listen, on_progress=report))
 
         def stop_listening(e):
-            nonlocal is_listening
-            if is_listening:
-                output_text.value = "Processing..."
-                page.update()
-                audio_file_path = "train_announcement.wav"
-                if os.path.exists(audio_file_path):
-                    transcript = process_audio_with_translation(page, audio_file_path, output_text, user_name)
-                    stt_textbox.value = transcript
-                    page.update()
-                else:
-                    output_text.value = f"Audio file '{audio_file_path}' not found."
-                is_listening = False
-            page.update()
+            nonlocal record_job
+            recording = record_job
+            if recording is None:
+                return
+            if recording.name == "live":
+                record_job = None
+                recording.cancel()  # Stops capture; pending utterances still finish
+
+                def finish_live(job):
+                    transcript = recording.wait()
+                    job.raise_if_cancelled()
+                    if transcript:
+                        stt_textbox.value = translate_transcript(transcript, output_text, user_id, spoken_language())
+                    else:
+                        job.report(FAILED_TRANSCRIPTION)
+
+                track(run_job("process", finish_live, on_progress=report))
+                return
+            record_job = None
+            recording.cancel()  # Ends capture; what was recorded so far gets processed
+
+            def process(job):
+                audio = recording.wait()
+                job.raise_if_cancelled()
+                if audio is None:
+                    return  # The recording job already reported why
+                job.report("Processing...")
+                transcript = process_audio_with_translation(page, audio, output_text, user_id, cancel_event=job.cancel_event,
+                                                            denoise=denoise_switch.value, language=spoken_language())
+                job.raise_if_cancelled()
+                stt_textbox.value = transcript
+
+            track(run_job("process", process, on_progress=report))
 
         def translate_speech(e):
-            translate_and_speak_text(stt_textbox, trans_langbox, stt_translation, page, user_name)
-            page.update()
+            track(run_job("translate", lambda job: translate_and_speak_text(stt_textbox, trans_langbox, stt_translation, page, user_id, session.player)))
+
+        def recalibrate_microphone(e):
+            track(run_job("recalibrate", lambda job: recalibrate(session.recognizer, report=job.report), on_progress=report))
+
+        def cancel_jobs(e):
+            nonlocal record_job
+            record_job = None
+            for job in active_jobs:
+                job.cancel()
+            stop_audio()
+            report("Cancelled.")
+
+        # In server mode the microphone is the server's, so visitors upload a recording
+        # instead; it lands in the shared upload directory and moves to the session's scratch.
+        # Uploads are not denoised: the only noise profile is the server microphone's.
+        def process_upload(path):
+            def process(job):
+                job.report("Processing...")
+                transcript = process_audio_with_translation(page, path, output_text, user_id, cancel_event=job.cancel_event, language=spoken_language())
+                job.raise_if_cancelled()
+                stt_textbox.value = transcript
+
+            track(run_job("process", process, on_progress=report))
+
+        def on_file_picked(e):
+            if not e.files:
+                return
+            extension = os.path.splitext(e.files[0].name)[1].lstrip(".").lower()
+            if extension not in upload_formats():
+                report(f"Cannot decode .{extension} recordings on this server; upload {', '.join(upload_formats())}")
+                return
+            name = f"{os.path.basename(session.scratch_dir)}-{e.files[0].name}"  # Unique across sessions
+            upload_picker.upload([ft.FilePickerUploadFile(name, upload_url=page.get_upload_url(name, 600))])
+            report("Uploading...")
+
+        def on_file_uploaded(e):
+            if e.error:
+                report(f"Upload failed: {e.error}")
+            elif e.progress is not None and e.progress >= 1.0:
+                path = session.scratch_path(e.file_name)
+                os.replace(os.path.join(UPLOAD_DIR, e.file_name), path)
+                process_upload(path)
+
+        upload_controls = []
+        if upload_picker is not None:
+            upload_picker.on_result = on_file_picked
+            upload_picker.on_upload = on_file_uploaded
+            upload_controls.append(ft.ElevatedButton(
+                text="Upload Recording",
+                on_click=lambda e: upload_picker.pick_files(allowed_extensions=upload_formats()),
+            ))
+
+        # The microphone, live transcription, calibration and the noise reduction that uses
+        # it belong to the machine the app runs on; in a browser session they would use
+        # the server's audio device
+        if page.web:
+            capture_controls = []
+            calibration_controls = []
+        else:
+            capture_controls = [
+                live_switch,
+                denoise_switch,
+                ft.ElevatedButton(text="Start Listening", on_click=start_listening),
+                ft.ElevatedButton(text="Stop Listening and Process", on_click=stop_listening),
+            ]
+            calibration_controls = [ft.TextButton("Recalibrate microphone", on_click=recalibrate_microphone)]
 
         def clear_speech_to_text(e):
             stt_textbox.value = ""
@@ -477,13 +627,16 @@ def main(page: ft.Page):
             content=ft.Column(
                 [
                      ft.Text("Speech-To-Text Converter", size=25, weight="bold", color=ft.colors.RED),
-                            ft.ElevatedButton(text="Start Listening", on_click=start_listening),
-                            ft.ElevatedButton(text="Stop Listening and Process", on_click=stop_listening),
+                            spoken_langbox,
+                            *capture_controls,
+                            *upload_controls,
                             stt_textbox,
                             trans_langbox,
                             ft.ElevatedButton(text="Translate Speech", on_click=translate_speech),
                             stt_translation,
                             ft.ElevatedButton(text="Clear", on_click=clear_speech_to_text),
+                            ft.ElevatedButton(text="Cancel", on_click=cancel_jobs),
+                            *calibration_controls,
                             output_text,
                 ],
                 expand=True,
@@ -501,7 +654,11 @@ def main(page: ft.Page):
         trans_langbox = ft.TextField(label="Enter target language code", width=250)
 
         def speak_text(e):
-            text_to_speech(tts_textbox.value, "en")
+            text = tts_textbox.value
+            run_job("speak", lambda job: text_to_speech(text, "en", player=session.player, cancel_event=job.cancel_event))
+
+        def translate_and_speak(e):
+            run_job("translate", lambda job: translate_and_speak_text(tts_textbox, trans_langbox, tts_translated_text, page, user_id, session.player, job.cancel_event))
 
         def clear_tts(e):
             tts_textbox.value = ""
@@ -516,7 +673,7 @@ def main(page: ft.Page):
                             tts_textbox,
                             ft.ElevatedButton(text="Speak", on_click=speak_text),
                             trans_langbox,
-                            ft.ElevatedButton(text="Translate and Speak", on_click=lambda e: translate_and_speak_text(tts_textbox, trans_langbox, tts_translated_text, page, user_name)),
+                            ft.ElevatedButton(text="Translate and Speak", on_click=translate_and_speak),
                             tts_translated_text,
                             ft.ElevatedButton(text="Clear", on_click=clear_tts),
 
@@ -530,25 +687,88 @@ def main(page: ft.Page):
     page.update()
 
     # History feature view
+    # Rows are loaded a page at a time as the user scrolls, and the ListView only
+    # builds the items that are on screen, so opening the tab costs one page.
     def history_view():
-        user_id = get_user_id(user_name)  # Retrieve current user's ID
-        history_list = get_user_history(user_id)
-        content = [ft.Text("Translation History", size=24, weight="bold")]
-
-        from collections import defaultdict
-        grouped_history = defaultdict(list)
-
-        for item in history_list:
-            grouped_history[item[7]].append(f"{item[1]} -> {item[2]} ({item[3]} to {item[4]}) [{item[5]}]")  # item[7] is date
+        page_size = 50
+        next_cursor = None
+        exhausted = False
+        loading = False
+        last_date = None
+        query = ""
+
+        history_list = ft.ListView(expand=True, spacing=5, on_scroll_interval=50)
+        search_field = ft.TextField(label="Search history", width=350)
+        type_filter = ft.Dropdown(
+            label="Type",
+            width=180,
+            value="all",
+            options=[ft.dropdown.Option("all", "All"), ft.dropdown.Option("speech_to_text", "Speech to text"),
+                     ft.dropdown.Option("text_to_speech", "Text to speech")],
+        )
 
-        for date, entries in grouped_history.items():
-            content.append(ft.Text(f"Date: {date}"))
-            for entry in entries:
-                content.append(ft.Text(entry))
+        # Browsing pages through history by date; searching pages through ranked matches
+        def fetch_page(cursor):
+            if query:
+                conversion_type = None if type_filter.value == "all" else type_filter.value
+                return search_history(user_id, query, page_size, cursor, conversion_type=conversion_type)
+            return get_user_history_page(user_id, page_size, cursor)
+
+        def load_next_page():
+            nonlocal next_cursor, exhausted, loading, last_date
+            if exhausted or loading:
+                return
+            loading = True
+            try:
+                rows, next_cursor = fetch_page(next_cursor)
+                exhausted = next_cursor is None
+                for item in rows:
+                    date = str(item[7]).split(' ')[0]  # item[7] is date; group entries by day
+                    if query:
+                        history_list.controls.append(ft.Text(f"{item[1]} -> {item[2]} ({item[3]} to {item[4]}) [{item[5]}] {date}"))
+                        continue
+                    if date != last_date:
+                        history_list.controls.append(ft.Text(f"Date: {date}", weight="bold"))
+                        last_date = date
+                    history_list.controls.append(ft.Text(f"{item[1]} -> {item[2]} ({item[3]} to {item[4]}) [{item[5]}]"))
+                if query and not history_list.controls:
+                    history_list.controls.append(ft.Text("No matching translations."))
+            finally:
+                loading = False
+
+        def reload(e=None):
+            nonlocal next_cursor, exhausted, last_date, query
+            query = (search_field.value or "").strip()
+            next_cursor, exhausted, last_date = None, False, None
+            history_list.controls.clear()
+            load_next_page()
+            if e is not None:
+                history_list.update()
+
+        def on_search_change(e):
+            if not search_field.value and query:
+                reload(e)  # Cleared the box: back to the full history
+
+        def on_scroll(e):
+            # Fetch the next page when the user gets close to the bottom
+            if e.max_scroll_extent is not None and e.pixels >= e.max_scroll_extent - 200:
+                load_next_page()
+                history_list.update()
+
+        history_list.on_scroll = on_scroll
+        search_field.on_submit = reload
+        search_field.on_change = on_search_change
+        type_filter.on_change = lambda e: reload(e) if query else None
+        reload()
 
         return ft.Container(
             content=ft.Column(
-                controls=content,
+                controls=[
+                    ft.Text("Translation History", size=24, weight="bold"),
+                    ft.Row([search_field, type_filter, ft.ElevatedButton("Search", on_click=reload)]),
+                    history_list,
+                ],
+                expand=True,
             ),
             expand=True,
             padding=20
@@ -561,6 +781,14 @@ def main(page: ft.Page):
             padding=20
         )
 
+    # End the session and forget who was logged in
+    def log_out():
+        nonlocal user_name, user_id
+        user_name = session.user_name = None
+        user_id = session.user_id = None
+        session.cancel_jobs()
+        switch_view("login")
+
     # Function to switch between different views (login, signup, home)
     def switch_view(view_name):
         if view_name == "login":
@@ -576,6 +804,17 @@ def main(page: ft.Page):
 
     # Start with the login view
     switch_view("login")
-    setup_database()
-
-ft.app(target=main)
+    preload_language_profiles()  # In the background, after the first frame
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speech and translation app.")
+    parser.add_argument("--server", action="store_true", help="serve the app to browsers, one isolated session per visitor")
+    parser.add_argument("--host", help="address to listen on in server mode")
+    parser.add_argument("--port", type=int, default=8550, help="port to listen on in server mode")
+    args = parser.parse_args()
+    if args.server:
+        configure_server()
+        UPLOAD_DIR = tempfile.mkdtemp(prefix="uploads-")
+        ft.app(target=main, view=None, host=args.host, port=args.port, upload_dir=UPLOAD_DIR)
+    else:
+        ft.app(target=main)
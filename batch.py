@@ -0,0 +1,217 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import soundfile as sf
+import speech_recognition as sr
+from pydub import AudioSegment
+
+from calibration import load_profile, device_key
+from denoise import StreamingDenoiser, BLOCK_SECONDS, noise_threshold
+from language_id import detect_language, detect_languages
+from history import setup_database, add_translation, get_user_id, flush_history
+from segmentation import find_speech_ranges, recognize_detected_languages
+from transcription import transcribe_best
+from translation_cache import cached_translate
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".aif", ".aiff")
+NETWORK_THREADS = 8
+
+
+# Collect audio files from directories, single files and manifests.
+# A manifest is a .txt file with one path per line, or a .jsonl file of
+# {"path": ..., "language": ...} objects; relative paths resolve against the manifest.
+def collect_inputs(sources):
+    items = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        items.append({"path": os.path.join(root, name)})
+        elif source.endswith((".txt", ".jsonl")):
+            base = os.path.dirname(os.path.abspath(source))
+            with open(source, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    item = json.loads(line) if source.endswith(".jsonl") else {"path": line}
+                    item["path"] = os.path.join(base, item["path"])
+                    items.append(item)
+        else:
+            items.append({"path": source})
+    return items
+
+
+# Paths already written to the output file, so an interrupted run can resume
+def completed_paths(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line from a crash
+            if not record.get("error"):
+                done.add(record["path"])
+    return done
+
+
+# CPU stage, run in a worker process: decode, optionally denoise, and find speech spans.
+# A file is denoised only when it has the sample rate the noise threshold was learned at.
+def prepare_audio(path, noise_threshold=None, noise_rate=None):
+    info = sf.info(path)
+    block_size = max(1, int(BLOCK_SECONDS * info.samplerate))
+    denoise = noise_threshold is not None and info.samplerate == noise_rate
+    denoiser = StreamingDenoiser(noise_threshold) if denoise else None
+    chunks = []
+    for block in sf.blocks(path, blocksize=block_size, dtype="float32", always_2d=True):
+        samples = block.mean(axis=1)
+        chunks.append(denoiser.process(samples) if denoiser else samples)
+    if denoiser:
+        chunks.append(denoiser.flush())
+    samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+    segment = AudioSegment(data=pcm, sample_width=2, frame_rate=info.samplerate, channels=1)
+    return pcm, info.samplerate, find_speech_ranges(segment)
+
+
+# Network stage, run on a thread: recognize each span, detect language, translate, log to history
+def transcribe_and_translate(item, pcm, sample_rate, ranges, target, user_id):
+    language = item.get("language")
+
+    def range_audio(start, end):
+        return sr.AudioData(pcm[start * sample_rate // 1000 * 2:end * sample_rate // 1000 * 2], sample_rate, 2)
+
+    segments = []
+    for index, (start, end) in enumerate(ranges):
+        text, confidence = transcribe_best(range_audio(start, end), language, fan_out=1)
+        segments.append({"index": index, "start": start / 1000, "end": end / 1000, "text": text, "confidence": confidence})
+    if language is None:  # Detect each segment's language and recognize it again in that language
+        recognize_detected_languages(segments, lambda s: range_audio(*ranges[s["index"]]), {"fan_out": 1})
+    else:
+        for segment, segment_language in zip(segments, detect_languages([s["text"] for s in segments], hint=language)):
+            segment["language"] = segment_language
+
+    transcript = " ".join(s["text"] for s in segments if s["text"])
+    record = {"path": item["path"], "duration": len(pcm) / 2 / sample_rate, "segments": segments, "transcript": transcript}
+    if not transcript:
+        record["error"] = "Could not understand audio"
+        return record
+
+    record["language"] = detected = detect_language(transcript, hint=language)
+    record["target"] = target
+    record["translation"] = transcript if detected == target else cached_translate(transcript, source="auto", target=target)
+    if user_id is not None:
+        try:
+            add_translation(transcript, record["translation"], detected or "und", target, "batch", user_id)
+        except Exception as ex:  # The transcript and translation are still worth keeping
+            record["history_error"] = str(ex)
+    return record
+
+
+# Run the transcribe -> detect -> translate -> history pipeline over many files.
+# Decoding and noise reduction use a process pool, recognition and translation a
+# thread pool; each result is appended to output_path as one JSON line as soon as it
+# is ready, and files already in output_path are skipped, so re-running resumes.
+def run_batch(items, output_path, target="en", user_id=None, denoise=False, processes=None, threads=NETWORK_THREADS, report=print):
+    setup_database()
+    threshold = noise_rate = None
+    if denoise:
+        profile = load_profile(device_key(None))
+        if profile is not None and profile.noise_clip:
+            threshold, noise_rate = noise_threshold(profile.noise_samples()), profile.sample_rate
+        else:
+            report("No noise profile available; skipping noise reduction.")
+
+    done = completed_paths(output_path)
+    todo = [item for item in items if item["path"] not in done]
+    report(f"{len(todo)} file(s) to process, {len(items) - len(todo)} already done.")
+    counts = {"ok": 0, "failed": 0}
+    write_lock = threading.Lock()
+    start = time.monotonic()
+
+    # Worker processes are spawned, not forked: a fork would copy locks held by this
+    # process's threads (history writer, connection pool) in whatever state they are in
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as cpu_pool, \
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix="batch") as io_pool:
+        window = (processes or os.cpu_count() or 1) * 2  # Decoded audio held in memory at once
+        queue = iter(todo)
+        decoding = {}
+        networking = {}
+
+        def write(record):
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+            counts["failed" if record.get("error") else "ok"] += 1
+
+        def refill():
+            while len(decoding) + len(networking) < window:
+                item = next(queue, None)
+                if item is None:
+                    return
+                decoding[cpu_pool.submit(prepare_audio, item["path"], threshold, noise_rate)] = item
+
+        refill()
+        while decoding or networking:
+            finished, _ = wait(list(decoding) + list(networking), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in decoding:
+                    item = decoding.pop(future)
+                    try:
+                        pcm, sample_rate, ranges = future.result()
+                    except Exception as ex:
+                        write({"path": item["path"], "error": f"Decoding failed: {ex}"})
+                        continue
+                    if threshold is not None and sample_rate != noise_rate:
+                        report(f"{item['path']}: {sample_rate} Hz audio, noise profile is for {noise_rate} Hz; not denoised.")
+                    networking[io_pool.submit(transcribe_and_translate, item, pcm, sample_rate, ranges, target, user_id)] = item
+                else:
+                    item = networking.pop(future)
+                    try:
+                        write(future.result())
+                    except Exception as ex:
+                        write({"path": item["path"], "error": f"Processing failed: {ex}"})
+            refill()
+
+    flush_history()  # History rows are written behind; commit the last group before reporting
+    elapsed = time.monotonic() - start
+    report(f"Processed {counts['ok']} file(s), {counts['failed']} failed, in {elapsed:.1f}s.")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe and translate recorded announcements without the UI.")
+    parser.add_argument("inputs", nargs="+", help="audio files, directories, or .txt/.jsonl manifests")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL results file; also the resume checkpoint")
+    parser.add_argument("-t", "--target", default="en", help="language to translate into")
+    parser.add_argument("-u", "--user", help="record results in this user's history")
+    parser.add_argument("--denoise", action="store_true", help="apply noise reduction with the default microphone profile")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="decoding processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=NETWORK_THREADS, help="recognition/translation threads")
+    args = parser.parse_args(argv)
+
+    setup_database()  # The users table must exist before --user is looked up
+    user_id = None
+    if args.user:
+        user_id = get_user_id(args.user)
+        if user_id is None:
+            parser.error(f"unknown user '{args.user}'")
+
+    counts = run_batch(collect_inputs(args.inputs), args.output, args.target, user_id, args.denoise, args.processes, args.threads)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
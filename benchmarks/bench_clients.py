@@ -0,0 +1,63 @@
+# Benchmark: tail latency of translation calls against a misbehaving upstream.
+# Runs the local stand-in server with injected slow responses, throttling and
+# errors, and compares direct blocking calls with calls through the service client
+# (rate limit, retries with backoff, per-attempt timeout, deadline, circuit breaker).
+# Run from the repository root:  python benchmarks/bench_clients.py [calls]
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clients import HTTPTranslator, ServiceClient
+from standin_server import StandInServer
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(call, count, workers=16):
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(f"phrase {i}")
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(timed, range(count)))
+    latencies = [r[0] for r in results]
+    return percentile(latencies, 0.5), percentile(latencies, 0.99), max(latencies), sum(r[1] for r in results)
+
+
+def report(label, stats, count):
+    p50, p99, worst, ok = stats
+    print(f"{label:<16} p50 {p50 * 1000:7.0f} ms   p99 {p99 * 1000:7.0f} ms   max {worst * 1000:7.0f} ms   ok {ok}/{count}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = StandInServer(latency=0.02, jitter=0.02, slow_rate=0.05, slow_latency=5.0,
+                           throttle_rate=0.05, error_rate=0.05, seed=1)
+    with server:
+        direct = HTTPTranslator(server.base_url, target="fr", timeout=None)
+        report("direct", measure(direct.translate, count), count)
+
+        translator = HTTPTranslator(server.base_url, target="fr")
+        client = ServiceClient("bench", rate=200, burst=50, max_concurrency=16, retries=3,
+                               attempt_timeout=0.5, deadline=2.0)
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence the retry log lines
+            stats = measure(lambda text: client.call_sync(translator.translate, text), count)
+        report("service client", stats, count)
+        print(f"client stats: {client.stats()}")
+
+
+if __name__ == "__main__":
+    main()
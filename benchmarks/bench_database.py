@@ -0,0 +1,98 @@
+# Benchmark: connect-per-call SQLite helpers vs. the pooled data-access layer.
+# Run from the repository root:  python benchmarks/bench_database.py [rows]
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        input_text TEXT NOT NULL,
+        translated_text TEXT NOT NULL,
+        source_lang TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        conversion_type TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+]
+INSERT_SQL = "INSERT INTO history (input_text, translated_text, source_lang, target_lang, conversion_type, user_id) VALUES (?, ?, ?, ?, ?, ?)"
+LOOKUP_SQL = "SELECT id FROM users WHERE name = ?"
+
+
+def create_db(path):
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('bench', 'bench@example.com', 'x')")
+    conn.commit()
+    conn.close()
+
+
+# The helpers as they were: one connection, one statement, one commit per call
+def baseline_insert(path, row):
+    conn = sqlite3.connect(path)
+    conn.execute(INSERT_SQL, row)
+    conn.commit()
+    conn.close()
+
+
+def baseline_lookup(path, name):
+    conn = sqlite3.connect(path)
+    user_id = conn.execute(LOOKUP_SQL, (name,)).fetchone()
+    conn.close()
+    return user_id[0] if user_id else None
+
+
+# The app now looks the id up once at login and keeps it for the session
+def session_lookup(session, name):
+    if session.get("user_id") is None:
+        session["user_id"] = database.fetchone(LOOKUP_SQL, (name,))[0]
+    return session["user_id"]
+
+
+def rate(n, fn):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    row = ("hello", "hola", "en", "es", "text_to_speech", 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = os.path.join(tmp, "before.db")
+        after = os.path.join(tmp, "after.db")
+        create_db(before)
+        create_db(after)
+        database.configure(after)
+        session = {}
+
+        results = [
+            ("insert", rate(n, lambda: baseline_insert(before, row)), rate(n, lambda: database.execute(INSERT_SQL, row))),
+            ("user lookup", rate(n, lambda: baseline_lookup(before, "bench")), rate(n, lambda: session_lookup(session, "bench"))),
+            ("user lookup (uncached)", rate(n, lambda: baseline_lookup(before, "bench")),
+             rate(n, lambda: database.fetchone(LOOKUP_SQL, ("bench",)))),
+        ]
+        database.get_pool().close()
+
+    print(f"{'operation':<24}{'before/s':>12}{'after/s':>12}{'speedup':>10}")
+    for name, old, new in results:
+        print(f"{name:<24}{old:>12.0f}{new:>12.0f}{new / old:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Benchmark: streaming spectral-gating noise reduction throughput.
+# Reports seconds of audio processed per CPU-second, and peak block memory.
+# Run from the repository root:  python benchmarks/bench_denoise.py [seconds_of_audio]
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from denoise import BLOCK_SECONDS, StreamingDenoiser, noise_threshold
+
+SAMPLE_RATE = 16000
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 120.0
+    rng = np.random.default_rng(0)
+    noise_clip = (0.05 * rng.standard_normal(SAMPLE_RATE)).astype(np.float32)
+    threshold = noise_threshold(noise_clip)
+    block_size = int(BLOCK_SECONDS * SAMPLE_RATE)
+    t = np.arange(block_size) / SAMPLE_RATE
+    tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    denoiser = StreamingDenoiser(threshold)
+    blocks = int(seconds / BLOCK_SECONDS)
+    processed = 0
+    start = time.process_time()
+    for _ in range(blocks):
+        # Fresh noise per block so the clip is never held in memory as a whole
+        block = tone + (0.05 * rng.standard_normal(block_size)).astype(np.float32)
+        processed += len(denoiser.process(block))
+    processed += len(denoiser.flush())
+    cpu = time.process_time() - start
+
+    audio_seconds = processed / SAMPLE_RATE
+    print(f"audio processed:      {audio_seconds:.1f} s")
+    print(f"cpu time:             {cpu:.3f} s")
+    print(f"throughput:           {audio_seconds / cpu:.1f} s audio / CPU-s")
+    print(f"working set per block: {block_size * 4 / 1024:.0f} KiB of samples")
+
+
+if __name__ == "__main__":
+    main()
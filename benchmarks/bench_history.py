@@ -0,0 +1,92 @@
+# Benchmark: the history helpers against databases of 10^3 to 10^6 rows.
+# Each database is seeded with rows spread over USERS users and a year of dates;
+# the measured user owns an equal share.
+# Run from the repository root:
+#   python benchmarks/bench_history.py [--rows 1000,10000,100000,1000000] [--runs 5] [--json out.json]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from history import (add_translation, ensure_history_search, get_user_history, get_user_history_page,
+                     get_user_id, flush_history, group_history_by_date, search_history, setup_database)
+from results import Results, time_runs
+
+USERS = 100
+PAGE = 50
+SEED_BATCH = 50000
+INSERT_SQL = "INSERT INTO history (input_text, translated_text, source_lang, target_lang, conversion_type, user_id, date) VALUES (?, ?, ?, ?, ?, ?, ?)"
+LANGUAGES = ["en", "fr", "de", "es", "hi", "ta"]
+
+
+def seed(rows):
+    setup_database()
+    database.executemany("INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+                         [(f"user{u}", f"user{u}@example.com", "x") for u in range(1, USERS + 1)])
+    rng = random.Random(0)
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    for offset in range(0, rows, SEED_BATCH):
+        batch = []
+        for i in range(offset, min(rows, offset + SEED_BATCH)):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + rng.randrange(365 * 24 * 3600)))
+            batch.append((f"input text number {i}", f"translated text number {i}", rng.choice(LANGUAGES), "en",
+                          rng.choice(("speech_to_text", "text_to_speech")), i % USERS + 1, stamp))
+        database.executemany(INSERT_SQL, batch)
+    ensure_history_search()
+
+
+def deep_page(user_id, pages):
+    cursor = None
+    for _ in range(pages):
+        _, cursor = get_user_history_page(user_id, PAGE, cursor)
+        if cursor is None:
+            break
+
+
+def run(results, rows, runs):
+    user_id = get_user_id("user1")
+    per_user = rows // USERS
+    full_runs = runs if rows <= 100000 else 1  # Full dumps of a million rows take a while
+
+    results.add("get_history (all rows)", time_runs(lambda: database.fetchall("SELECT * FROM history ORDER BY id DESC"), full_runs), size=rows)
+    results.add("get_user_history", time_runs(lambda: get_user_history(user_id), runs), size=rows)
+    results.add("group_history_by_date", time_runs(lambda: group_history_by_date(user_id), runs), size=rows)
+    results.add("get_user_history_page (first)", time_runs(lambda: get_user_history_page(user_id, PAGE), runs), size=rows)
+    results.add("get_user_history_page (10 pages)", time_runs(lambda: deep_page(user_id, 10), runs), size=rows)
+    results.add("search_history (common word)", time_runs(lambda: search_history(user_id, "translated", PAGE), runs), size=rows)
+    results.add("search_history (rare word)", time_runs(lambda: search_history(user_id, str(rows // 2 + 1), PAGE), runs), size=rows)
+    results.add("search_history (prefix, filtered)",
+                time_runs(lambda: search_history(user_id, "transl", PAGE, conversion_type="speech_to_text"), runs), size=rows)
+    results.add("add_translation", time_runs(lambda: add_translation("hello", "bonjour", "en", "fr", "text_to_speech", user_id), runs), size=rows)
+    flush_history()  # add_translation writes behind; commit before the database is closed
+    results.add("get_user_id", time_runs(lambda: get_user_id("user1"), runs), size=rows)
+    print(f"    ({per_user} rows for the measured user)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark history queries on large databases.")
+    parser.add_argument("--rows", default="1000,10000,100000", help="comma-separated table sizes (up to 1000000)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args(argv)
+
+    results = Results("history")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [int(r) for r in args.rows.split(",")]:
+            database.configure(os.path.join(tmp, f"history-{rows}.db"))
+            start = time.perf_counter()
+            seed(rows)
+            print(f"seeded {rows} rows in {time.perf_counter() - start:.1f} s")
+            run(results, rows, args.runs)
+            database.get_pool().close()
+    results.write(args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Benchmark: streaming history export and bulk import for each file format.
+# Next to each format it measures the two floors the export cannot beat: iterating the
+# table with no formatting ("scan") and writing the same number of bytes ("disk"),
+# so the gap between them and an export is the per-row Python overhead.
+# Parquet is skipped when pyarrow is not installed.
+# Run from the repository root:
+#   python benchmarks/bench_history_export.py [--rows 1000000] [--json out.json]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from history import setup_database
+from history_export import export_history, import_history, iter_history
+from results import Results
+
+SEED_BATCH = 100000
+USERS = 100
+INSERT_SQL = "INSERT INTO history (input_text, translated_text, source_lang, target_lang, conversion_type, user_id, date) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+def seed(rows):
+    setup_database()
+    with database.get_pool().transaction() as conn:  # Seed without the search triggers; they are not measured here
+        conn.execute("DROP TRIGGER history_fts_insert")
+    rng = random.Random(0)
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    for offset in range(0, rows, SEED_BATCH):
+        database.executemany(INSERT_SQL, [
+            (f"input text number {i}", f"translated text number {i}", "en", "fr", "speech_to_text", i % USERS + 1,
+             time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + rng.randrange(365 * 24 * 3600))))
+            for i in range(offset, min(rows, offset + SEED_BATCH))])
+
+
+def scan():
+    for _ in iter_history():
+        pass
+
+
+def write_bytes(path, size):
+    block = b"x" * (1 << 20)
+    with open(path, "wb") as f:
+        for _ in range(size >> 20):
+            f.write(block)
+        f.write(block[:size & ((1 << 20) - 1)])
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def timed(results, name, rows, fn, size_bytes=None):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    results.add(name, [elapsed], size=rows)
+    rate = f"   {size_bytes / elapsed / 1e6:8.1f} MB/s" if size_bytes else ""
+    print(f"    {rows / elapsed:12.0f} rows/s{rate}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark history export and import.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        import pyarrow  # noqa: F401
+        formats = ["jsonl", "csv", "parquet"]
+    except ImportError:
+        formats = ["jsonl", "csv"]
+        print("pyarrow is not installed; skipping Parquet")
+
+    results = Results("history_export")
+    rows = args.rows
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure(os.path.join(tmp, "source.db"))
+        start = time.perf_counter()
+        seed(rows)
+        print(f"seeded {rows} rows in {time.perf_counter() - start:.1f} s")
+        timed(results, "scan (no formatting)", rows, scan)
+        for fmt in formats:
+            path = os.path.join(tmp, f"history.{fmt}")
+            timed(results, f"export {fmt}", rows, lambda: export_history(path))
+            size = os.path.getsize(path)
+            timed(results, f"disk write ({size >> 20} MB)", rows, lambda: write_bytes(os.path.join(tmp, "raw"), size), size)
+        database.get_pool().close()
+
+        for fmt in formats:
+            path = os.path.join(tmp, f"history.{fmt}")
+            database.configure(os.path.join(tmp, f"import-{fmt}.db"))
+            timed(results, f"import {fmt}", rows, lambda: import_history(path, report=lambda message: None),
+                  os.path.getsize(path))
+            database.get_pool().close()
+    results.write(args.json)
+
+
+if __name__ == "__main__":
+    main()
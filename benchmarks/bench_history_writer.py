@@ -0,0 +1,69 @@
+# Benchmark: history inserts from concurrent sessions, one transaction per row
+# (the old inline add_translation) vs. the write-behind, group-committing writer.
+# Reports rows/s and the latency a caller sees per insert.
+# Run from the repository root:  python benchmarks/bench_history_writer.py [rows] [threads]
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from history import HISTORY_INSERT_SQL, setup_database
+from history_writer import WriteBehindWriter
+
+ROW = ("hello", "bonjour", "en", "fr", "text_to_speech", 1)
+
+
+def run(insert, rows, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def producer():
+        local = []
+        for _ in range(rows // threads):
+            start = time.perf_counter()
+            insert(ROW)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=producer) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return start, sorted(latencies)
+
+
+def report(label, rows, elapsed, latencies):
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{label:<14}{rows / elapsed:>12.0f} rows/s   caller p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure(os.path.join(tmp, "inline.db"))
+        setup_database()
+        start, latencies = run(lambda row: database.execute(HISTORY_INSERT_SQL, row), rows, threads)
+        report("inline", rows, time.perf_counter() - start, latencies)
+
+        database.configure(os.path.join(tmp, "behind.db"))
+        setup_database()
+        writer = WriteBehindWriter(HISTORY_INSERT_SQL, name="bench-writer")
+        start, latencies = run(writer.submit, rows, threads)
+        writer.flush()  # Throughput counts rows committed, not just queued
+        report("write-behind", rows, time.perf_counter() - start, latencies)
+        print(f"writer stats: {writer.stats()}")
+        writer.close()
+        database.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Benchmark: language detections per second.
+# Compares langdetect.detect() as the app used to call it with the language_id
+# component on unique texts (seeded, profiles preloaded) and on repeated texts (memoized).
+# Run from the repository root:  python benchmarks/bench_language_id.py [count]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langdetect import detect
+
+import language_id
+
+PHRASES = [
+    "The train to Chennai Central will depart from platform number four",
+    "La prochaine gare est Paris Gare de Lyon",
+    "Der Zug nach Berlin hat zehn Minuten Verspätung",
+    "El tren con destino a Madrid sale del andén tres",
+    "प्लेटफार्म संख्या दो पर आने वाली गाड़ी",
+    "Il treno per Roma è in partenza dal binario cinque",
+]
+
+
+def rate(texts, fn):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    unique = [f"{PHRASES[i % len(PHRASES)]} {i}" for i in range(count)]
+    repeated = [PHRASES[i % len(PHRASES)] for i in range(count)]
+
+    start = time.perf_counter()
+    language_id.get_detector_factory()
+    print(f"profile load (once):        {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"langdetect.detect:          {rate(unique, detect):.0f} detections/s")
+    print(f"detect_language (unique):   {rate(unique, language_id.detect_language):.0f} detections/s")
+    print(f"detect_language (repeated): {rate(repeated, language_id.detect_language):.0f} detections/s")
+    start = time.perf_counter()
+    language_id.detect_languages(repeated)
+    print(f"detect_languages (batch):   {count / (time.perf_counter() - start):.0f} detections/s")
+
+    first = [language_id._detect_uncached(p.lower()) for p in PHRASES]
+    again = [language_id._detect_uncached(p.lower()) for p in PHRASES]
+    print(f"deterministic:              {first == again} {first}")
+
+
+if __name__ == "__main__":
+    main()
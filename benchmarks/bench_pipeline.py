@@ -0,0 +1,118 @@
+# Benchmark: every pipeline stage, and the whole pipeline, on synthetic audio of
+# growing length with all external services replaced by local stand-ins
+# (see standins.py): fake microphone, stub recognizer, stand-in translation/TTS
+# server, silent playback and a scratch database.
+# Run from the repository root:
+#   python benchmarks/bench_pipeline.py [--seconds 2,8,30] [--runs 5] [--latency 0.05] [--json out.json]
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from results import Results, time_runs
+from standins import StandIns, TRANSCRIPT, FakeControl, FakePage, audio_fixture, feed_microphone, synthetic_speech, write_wav
+
+USER = "bench"
+
+
+def sentences(count):
+    return " ".join(f"{TRANSCRIPT} {i}." for i in range(count))
+
+
+def run_stages(results, standins, seconds, runs):
+    import app
+    import language_id
+    from denoise import denoise_file
+    from history import add_translation, get_user_id
+    from transcription import transcribe_audio_with_retries
+    from segmentation import transcribe_segments
+    from translation_cache import cached_translate
+
+    pcm = synthetic_speech(seconds)
+    wav = write_wav(standins.path(f"fixture-{seconds}.wav"), pcm)
+    audio = audio_fixture(seconds)
+    text = sentences(max(1, int(seconds // 4)))
+    report = lambda message: None
+    user_id = get_user_id(USER)
+
+    def record():
+        stop_event = feed_microphone(pcm)
+        app.record_audio_to_file(report, standins.path("recording.wav"), stop_event=stop_event)
+
+    results.add("record_audio_to_file", time_runs(record, runs, warmup=1), size=seconds)
+    results.add("reduce_noise", time_runs(lambda: app.reduce_noise(wav, standins.path("reduced.wav")), runs, warmup=1), size=seconds)
+    results.add("denoise_file (streaming)", time_runs(lambda: denoise_file(wav, standins.path("denoised.wav"), 0.02), runs, warmup=1), size=seconds)
+    results.add("transcribe_audio_with_retries", time_runs(lambda: transcribe_audio_with_retries(wav), runs), size=seconds)
+    results.add("transcribe_segments", time_runs(lambda: transcribe_segments(audio), runs), size=seconds)
+
+    def detect_cold():
+        language_id._cache.clear()
+        language_id.detect_language(text)
+
+    results.add("detect_language (cold)", time_runs(detect_cold, runs, warmup=1), size=seconds)
+    results.add("detect_language (memoized)", time_runs(lambda: language_id.detect_language(text), runs), size=seconds)
+
+    def translate_cold():
+        standins.clear_caches()
+        cached_translate(text, source="auto", target="en")
+
+    results.add("translate (cold)", time_runs(translate_cold, runs), size=seconds)
+    results.add("translate (cached)", time_runs(lambda: cached_translate(text, source="auto", target="en"), runs), size=seconds)
+
+    def speak_cold():
+        standins.clear_caches()
+        app.text_to_speech(text, "fr")
+
+    results.add("text_to_speech (cold)", time_runs(speak_cold, runs), size=seconds)
+    results.add("text_to_speech (cached)", time_runs(lambda: app.text_to_speech(text, "fr"), runs), size=seconds)
+    results.add("add_translation", time_runs(lambda: add_translation(text, text, "fr", "en", "speech_to_text", 1), runs), size=seconds)
+
+    def pipeline():
+        standins.clear_caches()
+        language_id._cache.clear()
+        stop_event = feed_microphone(pcm)
+        recorded = app.record_audio(report, stop_event=stop_event)
+        output = FakeControl()
+        translated = app.process_audio_with_translation(FakePage(), recorded, output, user_id)
+        app.text_to_speech(translated, "en")
+
+    results.add("full pipeline (cold caches)", time_runs(pipeline, runs), size=seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transcription/translation pipeline with local stand-ins.")
+    parser.add_argument("--seconds", default="2,8,30", help="comma-separated fixture lengths in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated service latency in seconds")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args(argv)
+
+    results = Results("pipeline")
+    with StandIns(latency=args.latency) as standins:
+        from history import setup_database
+        from database import execute
+
+        setup_database()
+        execute("INSERT INTO users (name, email, password) VALUES (?, ?, ?)", (USER, "bench@example.com", "x"))
+        for seconds in [float(s) for s in args.seconds.split(",")]:
+            with contextlib.redirect_stdout(io.StringIO()):  # The stages log progress with print()
+                run_stages(_Echo(results), standins, seconds, args.runs)
+    results.write(args.json)
+
+
+# Results whose progress lines still reach the terminal while stage output is silenced
+class _Echo:
+    def __init__(self, results):
+        self.results = results
+
+    def add(self, *args, **kwargs):
+        with contextlib.redirect_stdout(sys.__stdout__):
+            return self.results.add(*args, **kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# Load test: N concurrent user sessions in server mode, against the local stand-ins
+# (see standins.py). Every simulated session opens its own Session and repeats a turn:
+#   record   capture a recording into the session's scratch directory
+#   process  split, recognize, detect the language, translate, record history
+#   speak    translate a fresh sentence and synthesize it for the session's player
+#   history  load the first page of the user's history
+# Each step is a job on the shared, bounded pool. Reports turns/s and per-step latency
+# percentiles for each level of concurrency, and checks that sessions stayed isolated.
+# Run from the repository root:
+#   python benchmarks/bench_sessions.py [--sessions 1,8,32] [--turns 3] [--seconds 4] [--latency 0.05] [--json out.json]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from results import Results
+from standins import StandIns, FakeControl, FakePage, FakePlayer, feed_microphone, synthetic_speech
+
+STEPS = ("record", "process", "speak", "history", "turn")
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))] if samples else float("nan")
+
+
+# One simulated visitor: log in, then run `turns` turns, each step as a job on the pool
+def run_session(manager, number, turns, pcm, timings, errors, lock):
+    import app
+    from history import get_user_history_page, get_user_id
+    from jobs import JobQueueFull
+
+    session = manager.open(f"load-{number}")
+    session.user_name = f"user{number}"
+    session.user_id = user_id = get_user_id(session.user_name)  # As logging in does
+    session.player = FakePlayer()
+    report = lambda message: None
+    local = {step: [] for step in STEPS}
+
+    def run(name, fn):
+        start = time.perf_counter()
+        while True:
+            try:
+                job = session.submit(name, fn)
+                break
+            except JobQueueFull:
+                time.sleep(0.01)  # Pool or session quota full: back off like a user clicking again
+        job.wait()
+        local[name].append(time.perf_counter() - start)
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    try:
+        for turn in range(turns):
+            turn_start = time.perf_counter()
+            path = session.scratch_path(f"recording-{turn}.wav")
+
+            def record(job):
+                stop_event = feed_microphone(pcm)  # The fake microphone is fed per job thread
+                return app.record_audio_to_file(report, path, stop_event=stop_event, recognizer=session.recognizer)
+
+            recorded = run("record", record)
+            transcript = run("process", lambda job: app.process_audio_with_translation(FakePage(), recorded, FakeControl(), user_id))
+            text = FakeControl(f"{transcript} Session {number}, turn {turn}.")
+            run("speak", lambda job: app.translate_and_speak_text(text, FakeControl("fr"), FakeControl(), FakePage(), user_id, session.player))
+            run("history", lambda job: get_user_history_page(user_id, 50))
+            local["turn"].append(time.perf_counter() - turn_start)
+    except Exception as ex:
+        with lock:
+            errors.append(f"session {number}: {ex!r}")
+    finally:
+        with lock:
+            for step, samples in local.items():
+                timings[step].extend(samples)
+            timings["spoken"].append(session.player.spoken)
+            timings["sessions"].append(session)
+
+
+def run_level(results, manager, sessions, turns, pcm):
+    from history import flush_history
+
+    timings = {step: [] for step in STEPS}
+    timings["spoken"], timings["sessions"] = [], []
+    errors = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=run_session, args=(manager, n, turns, pcm, timings, errors, lock)) for n in range(1, sessions + 1)]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # The pipeline logs progress with print()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        flush_history()
+    elapsed = time.perf_counter() - start
+
+    opened = timings["sessions"]
+    isolated = len({id(s.recognizer) for s in opened}) == len(opened) and len({s.scratch_dir for s in opened}) == len(opened)
+    completed = len(timings["turn"])
+    for step in STEPS:
+        if timings[step]:
+            results.add(f"{step} (latency)", timings[step], size=sessions)
+    print(f"  {sessions} sessions: {completed} turns in {elapsed:.1f} s = {completed / elapsed:.2f} turns/s; "
+          f"turn p50 {percentile(timings['turn'], 0.5) * 1000:.0f} ms, p95 {percentile(timings['turn'], 0.95) * 1000:.0f} ms, "
+          f"p99 {percentile(timings['turn'], 0.99) * 1000:.0f} ms; "
+          f"{sum(timings['spoken'])} sentences synthesized; isolated: {'yes' if isolated else 'NO'}")
+    for error in errors:
+        print(f"  error: {error}")
+    results.add("throughput (s per turn)", [elapsed / max(1, completed)], size=sessions)
+    for session in opened:
+        manager.close(session.id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test concurrent sessions against local stand-ins.")
+    parser.add_argument("--sessions", default="1,8,32", help="comma-separated numbers of concurrent sessions")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--seconds", type=float, default=4.0, help="length of each recording")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated service latency in seconds")
+    parser.add_argument("--workers", type=int, help="shared job pool size (default: the server-mode setting)")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args(argv)
+    levels = [int(s) for s in args.sessions.split(",")]
+
+    results = Results("sessions")
+    with StandIns(latency=args.latency):
+        from database import executemany
+        from history import setup_database
+        from sessions import configure_server, SERVER_WORKERS, SESSION_MAX_JOBS
+
+        workers = args.workers or SERVER_WORKERS
+        manager = configure_server(workers=workers, max_pending=max(levels) * SESSION_MAX_JOBS, max_sessions=max(levels))
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup_database()
+        executemany("INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+                    [(f"user{n}", f"user{n}@example.com", "x") for n in range(1, max(levels) + 1)])
+        pcm = synthetic_speech(args.seconds)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+            app.record_audio(lambda message: None, stop_event=feed_microphone(synthetic_speech(6)))  # Store the microphone's calibration profile
+        print(f"{workers} shared workers, {args.turns} turns per session, {args.seconds:g} s recordings, "
+              f"{args.latency * 1000:.0f} ms service latency")
+        for sessions in levels:
+            run_level(results, manager, sessions, args.turns, pcm)
+        print(f"session manager: {manager.stats()}")
+        from clients import SERVICE_DEFAULTS, get_service_client
+        # Speech synthesis goes through the shared "tts" client, whose rate limit caps turns/s
+        print(f"tts client ({SERVICE_DEFAULTS['tts']['rate']:g} calls/s): {get_service_client('tts').stats()}")
+    results.write(args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Benchmark: startup time from `import app` to the first rendered frame (the login view).
+# Each run is a fresh interpreter in a scratch directory, so nothing is cached in-process.
+# Also lists heavy libraries that were imported before the first frame; there should be none.
+# Run from the repository root:  python benchmarks/bench_startup.py [runs]
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["librosa", "noisereduce", "soundfile", "pydub", "pygame", "nltk", "langdetect", "numpy", "deep_translator", "gtts"]
+
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, REPO)
+import app
+imported = time.perf_counter()
+
+
+class FirstFramePage:
+    def __init__(self):
+        self.views = []
+        self.overlay = []
+        self.session_id = "startup-probe"
+        self.web = False
+        self.on_close = None
+        self.first_frame = None
+
+    def update(self):
+        if self.first_frame is None and self.views:
+            self.first_frame = time.perf_counter()
+
+
+page = FirstFramePage()
+app.main(page)
+print(json.dumps({
+    "import": imported - start,
+    "first_frame": (page.first_frame or time.perf_counter()) - start,
+    "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+}))
+'''
+
+
+def run_once():
+    with tempfile.TemporaryDirectory() as scratch:
+        code = f"REPO = {REPO!r}\nHEAVY_MODULES = {HEAVY_MODULES!r}\n" + PROBE
+        result = subprocess.run([sys.executable, "-c", code], cwd=scratch, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = [run_once() for _ in range(runs)]
+    summary = {
+        "runs": runs,
+        "import_median_s": statistics.median(s["import"] for s in samples),
+        "first_frame_median_s": statistics.median(s["first_frame"] for s in samples),
+        "heavy_modules": sorted({m for s in samples for m in s["heavy_modules"]}),
+    }
+    print(f"import app (median):          {summary['import_median_s'] * 1000:.0f} ms")
+    print(f"import to first frame (median): {summary['first_frame_median_s'] * 1000:.0f} ms")
+    print(f"heavy modules loaded:         {', '.join(summary['heavy_modules']) or 'none'}")
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Machine-readable benchmark results, so runs can be compared across commits.
+# Each benchmark collects timings into a Results and writes them as JSON:
+#   {"benchmark", "commit", "python", "platform", "created",
+#    "results": [{"name", "size", "unit", "runs", "median", "p90", "min", "max"}, ...]}
+# Compare two result files:  python benchmarks/results.py old.json new.json
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Time fn() `runs` times (after `warmup` untimed calls); returns seconds per run
+def time_runs(fn, runs=5, warmup=0):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Results:
+    def __init__(self, benchmark):
+        self.benchmark = benchmark
+        self.entries = []
+
+    def add(self, name, samples, size=None, unit="s"):
+        samples = sorted(samples)
+        entry = {
+            "name": name,
+            "size": size,
+            "unit": unit,
+            "runs": len(samples),
+            "median": statistics.median(samples),
+            "p90": samples[min(len(samples) - 1, int(0.9 * len(samples)))],
+            "min": samples[0],
+            "max": samples[-1],
+        }
+        self.entries.append(entry)
+        size_label = f" [{size}]" if size is not None else ""
+        print(f"{name + size_label:<44} median {entry['median'] * 1000:10.2f} ms   p90 {entry['p90'] * 1000:10.2f} ms")
+        return entry
+
+    def as_dict(self):
+        return {
+            "benchmark": self.benchmark,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": self.entries,
+        }
+
+    def write(self, path):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.as_dict(), f, indent=2)
+            print(f"Results written to {path}")
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data, {(r["name"], r["size"]): r for r in data["results"]}
+
+
+# Print median changes between two result files; returns the entries that got slower by more than `threshold`
+def compare(old_path, new_path, threshold=0.10):
+    old, old_results = _load(old_path)
+    new, new_results = _load(new_path)
+    print(f"{old['benchmark']}: {old.get('commit')} -> {new.get('commit')}")
+    regressions = []
+    for key, entry in new_results.items():
+        before = old_results.get(key)
+        if before is None or not before["median"]:
+            continue
+        change = entry["median"] / before["median"] - 1
+        label = f"{key[0]} [{key[1]}]" if key[1] is not None else key[0]
+        flag = "  SLOWER" if change > threshold else ""
+        print(f"{label:<44} {before['median'] * 1000:10.2f} ms -> {entry['median'] * 1000:10.2f} ms  {change:+7.1%}{flag}")
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python benchmarks/results.py old.json new.json")
+    sys.exit(1 if compare(sys.argv[1], sys.argv[2]) else 0)
@@ -0,0 +1,249 @@
+# Deterministic local stand-ins for everything outside the process, shared by the
+# benchmarks: synthetic audio fixtures, a fake microphone, a stub recognizer, the
+# stand-in HTTP server for translation and TTS, a silent pygame and browser player, and
+# a scratch database.
+# install() wires them into the app's modules; nothing touches the network or a device.
+import io
+import os
+import sys
+import tempfile
+import threading
+import wave
+
+import numpy as np
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import recognizers
+import tts_cache
+import tts_stream
+from clients import HTTPSynthesizer, HTTPTranslator, ServiceClient
+from standin_server import StandInServer
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHUNK = 1024
+TRANSCRIPT = "Le train à destination de Paris partira du quai numéro quatre"
+
+
+# Speech-like audio: tone bursts ("words") separated by pauses, over low background
+# noise. Returns 16-bit mono PCM bytes.
+def synthetic_speech(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = int(seconds * sample_rate)
+    signal = 0.01 * rng.standard_normal(samples)
+    position = int(0.3 * sample_rate)
+    while position < samples:
+        length = int(rng.uniform(0.8, 2.5) * sample_rate)
+        end = min(samples, position + length)
+        t = np.arange(end - position) / sample_rate
+        signal[position:end] += 0.3 * np.sin(2 * np.pi * rng.uniform(150, 400) * t) * np.sin(2 * np.pi * 3 * t) ** 2
+        position = end + int(rng.uniform(0.6, 1.2) * sample_rate)
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def audio_fixture(seconds, seed=0):
+    return sr.AudioData(synthetic_speech(seconds, seed=seed), SAMPLE_RATE, SAMPLE_WIDTH)
+
+
+def write_wav(path, pcm, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(SAMPLE_WIDTH)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+    return path
+
+
+class _FakeStream:
+    def __init__(self, pcm, on_exhausted):
+        self._buffer = io.BytesIO(pcm)
+        self._on_exhausted = on_exhausted
+
+    def read(self, size):
+        data = self._buffer.read(size * SAMPLE_WIDTH)
+        if len(data) < size * SAMPLE_WIDTH:
+            self._on_exhausted()
+            data += b"\x00" * (size * SAMPLE_WIDTH - len(data))
+        return data
+
+
+# Drop-in for sr.Microphone that plays a PCM fixture and then sets stop_event, as if
+# the user pressed Stop when the fixture runs out. A fixture fed from a thread is used
+# by microphones opened on that thread, so concurrent simulated sessions each get their own.
+class FakeMicrophone(sr.AudioSource):
+    pcm = b""
+    stop_event = None
+    _local = threading.local()
+
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=CHUNK):
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = SAMPLE_WIDTH
+        self.CHUNK = chunk_size
+        self.stream = None
+
+    def __enter__(self):
+        pcm, stop_event = getattr(FakeMicrophone._local, "feed", (FakeMicrophone.pcm, FakeMicrophone.stop_event))
+        self.stream = _FakeStream(pcm, stop_event.set if stop_event else lambda: None)
+        return self
+
+    def __exit__(self, *exc):
+        self.stream = None
+
+    @classmethod
+    def feed(cls, pcm, stop_event):
+        cls.pcm = pcm
+        cls.stop_event = stop_event
+        cls._local.feed = (pcm, stop_event)
+
+
+# pygame stand-in: playback finishes instantly, so TTS timings are synthesis and plumbing only
+class _FakeMusic:
+    def load(self, *args):
+        pass
+
+    def play(self):
+        pass
+
+    def queue(self, *args):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_busy(self):
+        return False
+
+    def set_endevent(self, *args):
+        pass
+
+
+class _FakeEvent:
+    def __init__(self, type_):
+        self.type = type_
+
+
+class FakePygame:
+    USEREVENT = 24
+    NOEVENT = 0
+    error = RuntimeError
+
+    def __init__(self):
+        fake = self
+
+        class mixer:
+            music = _FakeMusic()
+
+        class display:
+            @staticmethod
+            def get_init():
+                return True
+
+        class event:
+            @staticmethod
+            def clear(*args):
+                pass
+
+            @staticmethod
+            def wait(timeout=0):
+                return _FakeEvent(fake.USEREVENT + 1)
+
+        self.mixer, self.display, self.event = mixer, display, event
+
+
+# Stand-in for a Flet control whose .value the app appends to
+class FakeControl:
+    def __init__(self, value=""):
+        self.value = value
+
+
+class FakePage:
+    def update(self):
+        pass
+
+
+# Stand-in for a session's BrowserPlayer: synthesizes every sentence, plays nothing
+class FakePlayer:
+    def __init__(self):
+        self.spoken = 0
+
+    def speak(self, text, lang):
+        for sentence in tts_stream.split_sentences(text):
+            tts_stream.synthesize_chunk(sentence, lang)
+            self.spoken += 1
+
+    def play(self, mp3):
+        pass
+
+    def stop(self):
+        pass
+
+
+class StandIns:
+    def __init__(self, latency=0.0, recognizer_delay=0.0, transcript=TRANSCRIPT):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.server = StandInServer(latency=latency)
+        self.stub = recognizers.StubBackend(default=transcript, delay=recognizer_delay)
+        self.db_path = os.path.join(self.scratch.name, "bench.db")
+        self._removed = []
+        self._tts_generation = 0
+
+    def path(self, name):
+        return os.path.join(self.scratch.name, name)
+
+    def install(self):
+        import translation_service
+        from translation_cache import TranslationCache
+
+        self.server.start()
+        database.configure(self.db_path)
+        for backend in recognizers.registered_backends():
+            self._removed.append(backend)
+            recognizers.unregister_backend(backend.name)
+        recognizers.register_backend(self.stub)
+        sr.Microphone = FakeMicrophone
+
+        translator_client = ServiceClient("translate-standin", rate=10000, burst=10000, max_concurrency=16)
+        translation_service._service = translation_service.TranslationService(
+            cache=TranslationCache(),
+            client_factory=lambda source, target: HTTPTranslator(self.server.base_url, source, target),
+            service_client=translator_client,
+        )
+        tts_stream._gtts_mp3 = HTTPSynthesizer(self.server.base_url)
+        tts_stream.pygame = FakePygame()
+        tts_stream._punkt_state = False  # Regex sentence splitting: same on every machine, no download
+        self._fresh_tts_cache()
+        return self
+
+    def _fresh_tts_cache(self):
+        self._tts_generation += 1
+        tts_cache._cache = tts_cache.TTSCache(cache_dir=self.path(f"tts-{self._tts_generation}"))
+
+    # Forget cached translations and speech so the next run measures cold paths
+    def clear_caches(self):
+        import translation_service
+
+        translation_service._service.cache.clear()
+        self._fresh_tts_cache()
+
+    def close(self):
+        recognizers.unregister_backend(self.stub.name)
+        for backend in self._removed:
+            recognizers.register_backend(backend)
+        self.server.stop()
+        database.get_pool().close()
+        self.scratch.cleanup()
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def feed_microphone(pcm):
+    stop_event = threading.Event()
+    FakeMicrophone.feed(pcm, stop_event)
+    return stop_event
@@ -0,0 +1,163 @@
+import audioop
+import threading
+import time
+
+import speech_recognition as sr
+
+from database import execute, fetchone
+from metrics import span
+
+CALIBRATION_SECONDS = 5  # Length of a full calibration, only run when no profile exists
+NOISE_CLIP_SECONDS = 1.0  # Ambient audio kept in the profile for noise reduction
+UPDATE_INTERVAL = 30.0  # Minimum seconds between background profile updates
+UPDATE_WEIGHT = 0.2  # How far a background update moves the stored threshold
+MIN_ENERGY_THRESHOLD = 50
+
+
+# Ambient-noise calibration for one microphone: the recognizer's energy threshold
+# plus a short clip of background noise (raw PCM) for noise reduction.
+class CalibrationProfile:
+    def __init__(self, device, energy_threshold, sample_rate, sample_width, noise_clip, updated_at=None):
+        self.device = device
+        self.energy_threshold = energy_threshold
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.noise_clip = noise_clip
+        self.updated_at = updated_at or time.time()
+
+    # The noise clip as float32 samples in [-1, 1], the form reduce_noise expects
+    def noise_samples(self):
+        import numpy as np
+
+        if not self.noise_clip:
+            return np.zeros(0, dtype=np.float32)
+        pcm16 = audioop.lin2lin(self.noise_clip, self.sample_width, 2) if self.sample_width != 2 else self.noise_clip
+        return np.frombuffer(pcm16, dtype="<i2").astype(np.float32) / 32768.0
+
+
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+# Table of stored profiles; applied as a schema migration (history.HISTORY_MIGRATIONS)
+def create_calibration_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS calibration_profiles (
+        device TEXT PRIMARY KEY,
+        energy_threshold REAL NOT NULL,
+        sample_rate INTEGER NOT NULL,
+        sample_width INTEGER NOT NULL,
+        noise_clip BLOB,
+        updated_at REAL NOT NULL
+    )
+    ''')
+
+
+# Stable key for a microphone: index plus device name, so reordered devices don't share a profile
+def device_key(mic_index=None):
+    if mic_index is None:
+        return "default"
+    try:
+        name = sr.Microphone.list_microphone_names()[mic_index]
+    except Exception:
+        name = ""
+    return f"{mic_index}:{name}"
+
+
+def load_profile(device):
+    with _profiles_lock:
+        if device in _profiles:
+            return _profiles[device]
+    row = fetchone(
+        "SELECT device, energy_threshold, sample_rate, sample_width, noise_clip, updated_at FROM calibration_profiles WHERE device = ?",
+        (device,),
+    )
+    profile = CalibrationProfile(*row) if row else None
+    if profile is not None:
+        with _profiles_lock:
+            _profiles[device] = profile
+    return profile
+
+
+def save_profile(profile):
+    execute(
+        "INSERT OR REPLACE INTO calibration_profiles (device, energy_threshold, sample_rate, sample_width, noise_clip, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (profile.device, profile.energy_threshold, profile.sample_rate, profile.sample_width, profile.noise_clip, profile.updated_at),
+    )
+    with _profiles_lock:
+        _profiles[profile.device] = profile
+
+
+def _threshold_from_frames(frames, sample_width, recognizer):
+    energies = sorted(audioop.rms(frame, sample_width) for frame in frames if frame)
+    if not energies:
+        return recognizer.energy_threshold
+    median = energies[len(energies) // 2]
+    return max(MIN_ENERGY_THRESHOLD, median * recognizer.dynamic_energy_ratio)
+
+
+def _noise_clip(frames, sample_rate, sample_width):
+    clip = b"".join(frames)
+    max_bytes = int(NOISE_CLIP_SECONDS * sample_rate) * sample_width
+    return clip[-max_bytes:]
+
+
+# Listen to the room for `duration` seconds and build a fresh profile for this device
+def calibrate(recognizer, source, device, duration=CALIBRATION_SECONDS):
+    frame_count = max(1, int(duration * source.SAMPLE_RATE / source.CHUNK))
+    frames = [source.stream.read(source.CHUNK) for _ in range(frame_count)]
+    profile = CalibrationProfile(
+        device,
+        _threshold_from_frames(frames, source.SAMPLE_WIDTH, recognizer),
+        source.SAMPLE_RATE,
+        source.SAMPLE_WIDTH,
+        _noise_clip(frames, source.SAMPLE_RATE, source.SAMPLE_WIDTH),
+    )
+    save_profile(profile)
+    return profile
+
+
+# Configure the recognizer for the microphone behind `source`.
+# A stored profile is applied instantly; the full calibration only runs for a
+# device we have not seen yet, or when recalibrate=True.
+def prepare_recognizer(recognizer, source, mic_index=None, recalibrate=False, report=print):
+    device = device_key(mic_index)
+    profile = None if recalibrate else load_profile(device)
+    if profile is None or profile.sample_rate != source.SAMPLE_RATE or profile.sample_width != source.SAMPLE_WIDTH:
+        report("Adjusting for ambient noise, please wait...")
+        with span("calibration"):
+            profile = calibrate(recognizer, source, device)
+    recognizer.energy_threshold = profile.energy_threshold
+    return profile
+
+
+# Fold silent frames captured between utterances into the device's profile.
+# Cheap to call often: updates are rate-limited and written on a background thread.
+def update_from_silence(recognizer, mic_index, frames, sample_rate, sample_width):
+    device = device_key(mic_index)
+    profile = load_profile(device)
+    if profile is None or not frames or time.time() - profile.updated_at < UPDATE_INTERVAL:
+        return
+    if profile.sample_rate != sample_rate or profile.sample_width != sample_width:
+        return
+    measured = _threshold_from_frames(frames, sample_width, recognizer)
+    updated = CalibrationProfile(
+        device,
+        profile.energy_threshold * (1 - UPDATE_WEIGHT) + measured * UPDATE_WEIGHT,
+        sample_rate,
+        sample_width,
+        _noise_clip(frames, sample_rate, sample_width) or profile.noise_clip,
+    )
+    with _profiles_lock:
+        _profiles[device] = updated  # Visible immediately; the disk write follows
+    recognizer.energy_threshold = updated.energy_threshold
+    threading.Thread(target=save_profile, args=(updated,), daemon=True).start()
+
+
+# Explicit recalibration, e.g. after moving to a noisier room
+def recalibrate(recognizer, mic_index=None, report=print):
+    mic = sr.Microphone(device_index=mic_index) if mic_index is not None else sr.Microphone()
+    with mic as source:
+        profile = prepare_recognizer(recognizer, source, mic_index, recalibrate=True, report=report)
+    report(f"Calibrated. Energy threshold: {profile.energy_threshold:.0f}")
+    return profile
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+RATE = 5.0  # Calls per second allowed through to a service on average
+BURST = 10  # Calls that may go out back to back before the rate applies
+MAX_CONCURRENCY = 4  # Calls to one service in flight at once
+RETRIES = 3  # Extra attempts after the first one fails with a retryable error
+ATTEMPT_TIMEOUT = 10.0  # Seconds one attempt may take
+DEADLINE = 30.0  # Seconds a call may take in total, retries and waiting included
+BACKOFF_BASE = 0.25  # First retry waits up to this long; doubles per attempt
+BACKOFF_CAP = 4.0
+FAILURE_THRESHOLD = 5  # Consecutive failures that open the circuit
+RESET_TIMEOUT = 30.0  # Seconds the circuit stays open before a trial call
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+# Upstream replied with an HTTP error; 429 and 5xx are worth retrying, other 4xx are not
+class ServiceHTTPError(RuntimeError):
+    def __init__(self, status, message=""):
+        super().__init__(f"HTTP {status} {message}".strip())
+        self.status = status
+        self.retryable = status == 429 or status >= 500
+
+
+# deep_translator's transient errors, matched by name so the library is only imported
+# where it is used; its other errors (TranslationNotFound, unsupported languages, bad
+# payloads) will not go away by trying again
+TRANSIENT_ERRORS = ("TooManyRequests", "RequestError", "ServerException")
+
+
+# Only errors that may go away by trying again: network and timeout errors, HTTP 429 and
+# 5xx, and the transient errors above. Anything else is a bug or a bad request.
+def is_retryable(ex):
+    retryable = getattr(ex, "retryable", None)
+    if retryable is not None:
+        return retryable
+    if isinstance(ex, (OSError, asyncio.TimeoutError)):
+        return True
+    if type(ex).__name__ == "gTTSError":  # Carries the HTTP response, or None if it could not connect
+        status = getattr(getattr(ex, "rsp", None), "status_code", None)
+        return status is None or status == 429 or status >= 500
+    return type(ex).__name__ in TRANSIENT_ERRORS
+
+
+# Full-jitter exponential backoff: a random wait in [0, min(cap, base * 2^attempt)]
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Token bucket: `rate` tokens per second refill a bucket holding at most `burst`
+class TokenBucket:
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Wait for a token; gives up with DeadlineExceeded if none arrives by `deadline`
+    async def acquire(self, deadline=None):
+        async with self._lock:
+            self._refill()
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise DeadlineExceeded("Rate limit wait would pass the deadline")
+            if wait:
+                await asyncio.sleep(wait)
+                self._refill()
+            self.tokens -= 1
+
+
+# Closed: calls go through. Open: calls fail fast with CircuitOpenError.
+# Half-open (after reset_timeout): one trial call decides whether to close again.
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._trial_running):
+                raise CircuitOpenError("Service unavailable; circuit open")
+            if state == "half-open":
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    # Give back the half-open trial slot when a call ended without a verdict (cancelled)
+    def release(self):
+        with self._lock:
+            self._trial_running = False
+
+
+# Event loop on a background thread, shared by every ServiceClient, so synchronous
+# code (Flet handlers, worker threads) can run calls on it
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="service-clients", daemon=True).start()
+    return _loop
+
+
+# Run a coroutine on the shared loop from synchronous code and wait for its result
+def run_sync(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+# Guards calls to one upstream service: rate limit, bounded concurrency, per-attempt
+# timeouts, retries with jittered backoff inside an overall deadline, and a circuit
+# breaker. The wrapped functions are blocking (deep_translator, gTTS), so each attempt
+# runs on this client's own thread pool; an attempt that times out is abandoned and
+# its result ignored.
+class ServiceClient:
+    def __init__(self, name, rate=RATE, burst=BURST, max_concurrency=MAX_CONCURRENCY, retries=RETRIES,
+                 attempt_timeout=ATTEMPT_TIMEOUT, deadline=DEADLINE, breaker=None):
+        self.name = name
+        self.retries = retries
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.calls = 0
+        self.attempts = 0
+        self.failures = 0
+        self._bucket = None  # asyncio primitives are created on the loop that uses them
+        self._semaphore = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix=f"client-{name}")
+
+    def _primitives(self):
+        if self._semaphore is None:
+            self._bucket = TokenBucket(self.rate, self.burst)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._bucket, self._semaphore
+
+    async def _attempt(self, fn, args, kwargs, deadline):
+        bucket, semaphore = self._primitives()
+        await bucket.acquire(deadline)
+        async with semaphore:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{self.name}: deadline passed while queued")
+            self.breaker.before_call()
+            self.attempts += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+            try:
+                result = await asyncio.wait_for(future, min(self.attempt_timeout, remaining))
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise DeadlineExceeded(f"{self.name}: attempt timed out") from None
+            except Exception as ex:
+                if is_retryable(ex):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()  # The service answered; the request was at fault
+                raise
+            else:
+                self.breaker.record_success()
+            finally:
+                self.breaker.release()  # A cancelled trial leaves the circuit half-open for the next call
+            return result
+
+    # Call fn(*args, **kwargs) under this client's policies; `deadline` is in seconds
+    async def call(self, fn, *args, deadline=None, **kwargs):
+        self.calls += 1
+        deadline = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(fn, args, kwargs, deadline)
+            except Exception as ex:
+                if not is_retryable(ex) or attempt >= self.retries:
+                    self.failures += 1
+                    raise
+                delay = backoff_delay(attempt)
+                if time.monotonic() + delay >= deadline:
+                    self.failures += 1
+                    raise
+                print(f"{self.name} call failed ({ex}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    # Run several calls concurrently; results come back in order, exceptions included
+    async def call_many(self, fn, items, deadline=None):
+        return await asyncio.gather(*(self.call(fn, item, deadline=deadline) for item in items), return_exceptions=True)
+
+    def call_sync(self, fn, *args, deadline=None, **kwargs):
+        return run_sync(self.call(fn, *args, deadline=deadline, **kwargs))
+
+    def stats(self):
+        return {"calls": self.calls, "attempts": self.attempts, "failures": self.failures, "circuit": self.breaker.state}
+
+
+SERVICE_DEFAULTS = {
+    "translate": {"rate": 5.0, "burst": 10, "max_concurrency": 4, "attempt_timeout": 10.0, "deadline": 30.0},
+    "tts": {"rate": 3.0, "burst": 6, "max_concurrency": 2, "attempt_timeout": 15.0, "deadline": 45.0},
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+# Get the process-wide client for a service ("translate", "tts")
+def get_service_client(name):
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = ServiceClient(name, **SERVICE_DEFAULTS.get(name, {}))
+        return client
+
+
+def _post(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as ex:
+        raise ServiceHTTPError(ex.code, ex.reason) from None
+
+
+# Translator speaking the stand-in server's JSON protocol (see standin_server.py);
+# drop-in for GoogleTranslator where a TranslationService client is expected
+class HTTPTranslator:
+    def __init__(self, base_url, source="auto", target="en", timeout=ATTEMPT_TIMEOUT):
+        self.url = base_url.rstrip("/") + "/translate"
+        self.source = source
+        self.target = target
+        self.timeout = timeout
+
+    def translate(self, text):
+        body = _post(self.url, {"text": text, "source": self.source, "target": self.target}, self.timeout)
+        return json.loads(body)["translatedText"]
+
+    def translate_batch(self, texts):
+        return [self.translate(text) for text in texts]
+
+
+# Speech synthesizer for the stand-in server; returns mp3 bytes like synthesize_mp3
+class HTTPSynthesizer:
+    def __init__(self, base_url, timeout=ATTEMPT_TIMEOUT):
+        self.url = base_url.rstrip("/") + "/tts"
+        self.timeout = timeout
+
+    def __call__(self, text, lang):
+        return _post(self.url, {"text": text, "lang": lang}, self.timeout)
@@ -0,0 +1,136 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = "users_and_history.db"
+POOL_SIZE = 4
+
+
+# Thread-safe pool of persistent SQLite connections.
+# Every connection runs in WAL mode so readers never block the writer, uses
+# synchronous=NORMAL so a commit does not fsync (only checkpoints do), and keeps
+# a per-connection cache of compiled statements keyed by SQL text.
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, size=POOL_SIZE, timeout=30.0, cached_statements=256):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,  # Connections move between threads, but one user at a time
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _acquire(self):
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        # Pool exhausted: wait for another thread to hand a connection back
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available after {self.timeout}s")
+
+    def _release(self, conn):
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()  # Never hand out a connection with a half-finished transaction
+        self._idle.put(conn)
+
+    # Borrow a connection for the duration of the with-block
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    # Borrow a connection and run the with-block in one transaction (commit or rollback)
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Get the process-wide pool, creating it on first use
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+# Point the data-access layer at another database file (benchmarks, tests, other hosts)
+def configure(path=DB_PATH, size=POOL_SIZE):
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(path, size)
+    return _pool
+
+
+# Run a single write statement in its own transaction and return the new row id
+def execute(sql, params=()):
+    with get_pool().transaction() as conn:
+        return conn.execute(sql, params).lastrowid
+
+
+# Run many writes of the same statement in one transaction
+def executemany(sql, seq_of_params):
+    with get_pool().transaction() as conn:
+        conn.executemany(sql, seq_of_params)
+
+
+def fetchone(sql, params=()):
+    with get_pool().connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def fetchall(sql, params=()):
+    with get_pool().connection() as conn:
+        return conn.execute(sql, params).fetchall()
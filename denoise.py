@@ -0,0 +1,115 @@
+import numpy as np
+import soundfile as sf
+import speech_recognition as sr
+
+N_FFT = 512
+HOP = N_FFT // 2  # 50% overlap; with a sqrt-Hann window on both sides this reconstructs exactly
+BLOCK_SECONDS = 1.0  # Audio processed per block; memory use is bounded by this, not clip length
+N_STD = 1.5  # Noise threshold = mean + N_STD * std of the noise magnitude per bin
+PROP_DECREASE = 0.9  # How much of the gated energy to remove (1.0 = all of it)
+
+_WINDOW = np.sqrt(np.hanning(N_FFT + 1)[:-1]).astype(np.float32)  # Periodic sqrt-Hann
+
+
+# Per-frequency-bin gate threshold learned from a clip of background noise
+def noise_threshold(noise_samples, n_std=N_STD):
+    noise_samples = np.asarray(noise_samples, dtype=np.float32)
+    if len(noise_samples) < N_FFT:
+        noise_samples = np.pad(noise_samples, (0, N_FFT - len(noise_samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(noise_samples, N_FFT)[::HOP]
+    magnitude = np.abs(np.fft.rfft(frames * _WINDOW, axis=1))
+    return magnitude.mean(axis=0) + n_std * magnitude.std(axis=0)
+
+
+# Spectral-gating noise reducer that consumes audio block by block.
+# Each block is framed, transformed, masked and overlap-added in a handful of
+# vectorized NumPy calls; only N_FFT samples of state carry over between blocks.
+class StreamingDenoiser:
+    def __init__(self, threshold, prop_decrease=PROP_DECREASE):
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.floor = 1.0 - prop_decrease
+        self._input = np.zeros(N_FFT - HOP, dtype=np.float32)  # Samples not yet covered by a full frame
+        self._overlap = np.zeros(HOP, dtype=np.float32)  # Second half of the last frame, awaiting its neighbour
+        self._skip = N_FFT - HOP  # Leading padding to drop so output lines up with input
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def _gain(self, magnitude):
+        # Soft gate: bins well above the noise threshold pass, bins at or below it are attenuated
+        gain = 1.0 - (self.threshold / np.maximum(magnitude, 1e-10)) ** 2
+        return np.clip(gain, self.floor, 1.0)
+
+    def _emit(self, samples):
+        if self._skip:
+            dropped = min(self._skip, len(samples))
+            samples = samples[dropped:]
+            self._skip -= dropped
+        self._samples_out += len(samples)
+        return samples
+
+    # Denoise the next block of float samples; returns however many output samples are ready
+    def process(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        self._samples_in += len(block)
+        buffer = np.concatenate((self._input, block))
+        frame_count = (len(buffer) - N_FFT) // HOP + 1
+        if frame_count <= 0:
+            self._input = buffer
+            return np.zeros(0, dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, N_FFT)[::HOP][:frame_count]
+        spectrum = np.fft.rfft(frames * _WINDOW, axis=1)
+        spectrum *= self._gain(np.abs(spectrum))
+        cleaned = np.fft.irfft(spectrum, n=N_FFT, axis=1).astype(np.float32) * _WINDOW
+
+        # Overlap-add: each frame's first half completes the previous frame's second half
+        output = cleaned[:, :HOP].copy()
+        output[0] += self._overlap
+        output[1:] += cleaned[:-1, HOP:]
+        self._overlap = cleaned[-1, HOP:].copy()
+        self._input = buffer[frame_count * HOP:]
+        return self._emit(output.reshape(-1))
+
+    # Push out the samples still held back for overlap; output length then equals input length
+    def flush(self):
+        tail = self.process(np.zeros(N_FFT, dtype=np.float32))
+        self._samples_in -= N_FFT
+        remaining = self._samples_in - (self._samples_out - len(tail))
+        return tail[:max(0, remaining)]
+
+
+def _pcm_to_float(pcm, sample_width):
+    dtype = {1: np.uint8, 2: "<i2", 4: "<i4"}[sample_width]
+    samples = np.frombuffer(pcm, dtype=dtype).astype(np.float32)
+    if sample_width == 1:
+        return (samples - 128.0) / 128.0
+    return samples / float(2 ** (8 * sample_width - 1))
+
+
+def _float_to_pcm16(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+# Denoise captured audio in memory, block by block; returns new 16-bit sr.AudioData
+def denoise_audio_data(audio_data, threshold, block_seconds=BLOCK_SECONDS):
+    sample_width = audio_data.sample_width if audio_data.sample_width in (1, 2, 4) else 2
+    raw = audio_data.get_raw_data(convert_width=sample_width)
+    block_bytes = max(1, int(block_seconds * audio_data.sample_rate)) * sample_width
+    denoiser = StreamingDenoiser(threshold)
+    chunks = []
+    for offset in range(0, len(raw), block_bytes):
+        chunks.append(_float_to_pcm16(denoiser.process(_pcm_to_float(raw[offset:offset + block_bytes], sample_width))))
+    chunks.append(_float_to_pcm16(denoiser.flush()))
+    return sr.AudioData(b"".join(chunks), audio_data.sample_rate, 2)
+
+
+# Denoise a mono audio file into output_path without loading the whole clip
+def denoise_file(file_path, output_path, threshold, block_seconds=BLOCK_SECONDS):
+    info = sf.info(file_path)
+    block_size = max(1, int(block_seconds * info.samplerate))
+    denoiser = StreamingDenoiser(threshold)
+    with sf.SoundFile(output_path, "w", samplerate=info.samplerate, channels=1, subtype="PCM_16") as out:
+        for block in sf.blocks(file_path, blocksize=block_size, dtype="float32", always_2d=True):
+            out.write(denoiser.process(block.mean(axis=1)))  # Downmix to mono
+        out.write(denoiser.flush())
+    return output_path
@@ -1,59 +1,341 @@
-import sqlite3
+import re
+import threading
+import unicodedata
 from datetime import datetime
+from database import get_pool, execute, fetchone, fetchall
+from history_writer import WriteBehindWriter
+from migrations import migrate
+from calibration import create_calibration_table
+from metrics import create_span_table
+from translation_cache import create_translation_cache_table
 
-# Function to check and setup the history database schema
-def setup_history_database():
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-
-    # Check if 'history' table already exists
-    c.execute("PRAGMA table_info(history);")
-    columns = [column[1] for column in c.fetchall()]
-
-    # If 'timestamp' column is missing, drop and recreate the table with the correct schema
-    if 'timestamp' not in columns:
-        print("Recreating the history table with the correct schema...")
-
-        # Drop the table if it exists (WARNING: This will delete all existing records)
-        c.execute("DROP TABLE IF EXISTS history;")
-
-        # Recreate the table with the correct schema
-        c.execute('''
-            CREATE TABLE history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                input_text TEXT NOT NULL,
-                translated_text TEXT NOT NULL,
-                source_lang TEXT NOT NULL,
-                target_lang TEXT NOT NULL,
-                action_type TEXT NOT NULL,
-                user_id INTEGER NOT NULL,
-                timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-        conn.commit()
-    conn.close()
-
-# Function to add a translation record to the history
+SEARCH_CANDIDATES = 1000  # Newest matches ranked by relevance per search
+BM25_K1 = 1.2  # Term-frequency saturation
+BM25_B = 0.75  # Weight of document length normalization
+SEARCH_PREFIX_LENGTH = 3  # Longest prefix the full-text index stores (prefix='2 3')
+
+# Schema of the history table. Older databases may have the columns action_type and
+# timestamp instead of conversion_type and date, or lack them; migration 1 reconciles them.
+HISTORY_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_text TEXT NOT NULL,
+    translated_text TEXT NOT NULL,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    conversion_type TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+)
+'''
+
+# Migration 1: users and history tables, bringing any earlier history layout in line
+# with HISTORY_TABLE_SQL without losing rows. Renames and added columns are cheap
+# ALTER TABLEs; only a table with no date column at all is copied, because SQLite
+# cannot add a column whose default is CURRENT_TIMESTAMP.
+def _create_tables(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL
+    )
+    ''')
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+    if not columns:
+        conn.execute(HISTORY_TABLE_SQL)
+        return
+    if "conversion_type" not in columns:
+        if "action_type" in columns:
+            conn.execute("ALTER TABLE history RENAME COLUMN action_type TO conversion_type")
+        else:
+            conn.execute("ALTER TABLE history ADD COLUMN conversion_type TEXT NOT NULL DEFAULT 'unknown'")
+    if "date" not in columns:
+        if "timestamp" in columns:
+            conn.execute("ALTER TABLE history RENAME COLUMN timestamp TO date")
+        else:
+            conn.execute("ALTER TABLE history RENAME TO history_old")
+            conn.execute(HISTORY_TABLE_SQL)
+            conn.execute('''
+            INSERT INTO history (id, input_text, translated_text, source_lang, target_lang, conversion_type, user_id)
+            SELECT id, input_text, translated_text, source_lang, target_lang, conversion_type, user_id FROM history_old
+            ''')
+            conn.execute("DROP TABLE history_old")
+
+# Migration 2: the index the per-user history queries rely on
+def _create_history_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_history_user_date ON history (user_id, date)")
+
+HISTORY_INSERT_SQL = "INSERT INTO history (input_text, translated_text, source_lang, target_lang, conversion_type, user_id) VALUES (?, ?, ?, ?, ?, ?)"
+_history_writer = None
+_history_writer_lock = threading.Lock()
+
+# Get the background writer that group-commits history rows
+def get_history_writer():
+    global _history_writer
+    with _history_writer_lock:
+        if _history_writer is None:
+            _history_writer = WriteBehindWriter(HISTORY_INSERT_SQL, name="history-writer")
+        return _history_writer
+
+# Function to add a translation to history
+# The row is queued and committed shortly after with others (see history_writer.py),
+# so the caller never waits for a disk sync. Call flush_history() before reading
+# back rows that must include it.
+def add_translation(input_text, translated_text, source_lang, target_lang, conversion_type, user_id):
+    get_history_writer().submit((input_text, translated_text, source_lang, target_lang, conversion_type, user_id))
+
+# Wait until every queued history row is committed
+def flush_history():
+    if _history_writer is not None:
+        _history_writer.flush()
+
+# Look up a user's ID by name (command-line tools); the app keeps the ID it got at login
+def get_user_id(user_name):
+    user_id = fetchone("SELECT id FROM users WHERE name = ?", (user_name,))
+    return user_id[0] if user_id else None  # Return None if no ID found
+
+# Function to add a translation record to the history, written immediately
 def add_translation_to_history(user_id, input_text, translated_text, source_lang, target_lang, action_type):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO history (user_id, input_text, translated_text, source_lang, target_lang, action_type, timestamp)
+    execute('''
+        INSERT INTO history (user_id, input_text, translated_text, source_lang, target_lang, conversion_type, date)
         VALUES (?, ?, ?, ?, ?, ?, ?)
     ''', (user_id, input_text, translated_text, source_lang, target_lang, action_type, timestamp))
-    conn.commit()
-    conn.close()
 
 # Function to get the translation history for a specific user
 def get_user_history(user_id):
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute("SELECT * FROM history WHERE user_id = ? ORDER BY date DESC", (user_id,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    flush_history()  # Include rows still waiting in the write-behind queue
+    return fetchall("SELECT * FROM history WHERE user_id = ? ORDER BY date DESC", (user_id,))
+
+# Create the indexes the per-user history queries rely on (migration 2)
+def ensure_history_indexes():
+    with get_pool().transaction() as conn:
+        _create_history_indexes(conn)
+
+# Fetch one page of a user's history, newest first.
+# Pagination is keyset-based: pass the returned cursor to get the next page, so
+# every page costs one index range scan no matter how deep the user has scrolled.
+# Returns (rows, next_cursor); next_cursor is None once the history is exhausted.
+def get_user_history_page(user_id, limit=50, cursor=None):
+    if cursor is None:
+        flush_history()  # Include rows still waiting in the write-behind queue
+        rows = fetchall(
+            "SELECT * FROM history WHERE user_id = ? ORDER BY date DESC, id DESC LIMIT ?",
+            (user_id, limit),
+        )
+    else:
+        cursor_date, cursor_id = cursor
+        rows = fetchall(
+            "SELECT * FROM history WHERE user_id = ? AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?",
+            (user_id, cursor_date, cursor_id, limit),
+        )
+    next_cursor = (rows[-1][7], rows[-1][0]) if len(rows) == limit else None  # row[7] is date, row[0] is id
+    return rows, next_cursor
+
+# Full-text index over input_text and translated_text, kept in sync with history by
+# triggers. user_id is indexed too (with zero weight in the ranking) so a search is
+# restricted to one user inside the index instead of filtering every match afterwards.
+# detail='column' drops word positions (no phrase queries) for much smaller doclists,
+# and the prefix indexes make as-you-type matching on short prefixes cheap. Combining
+# marks count as word characters so Indic words are not split at every vowel sign.
+# Applied as migration 3; ensure_history_search() re-applies it (and rebuilds the index
+# if it or its triggers went missing).
+def ensure_history_search():
+    with get_pool().transaction() as conn:
+        _create_history_search(conn)
+
+def _create_history_search(conn):
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE 'history_fts%'")}
+    conn.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+        input_text, translated_text, user_id,
+        content='history', content_rowid='id',
+        detail='column', prefix='2 3',
+        tokenize="unicode61 remove_diacritics 2 categories 'L* N* Co Mc Mn'"
+    )
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+        INSERT INTO history_fts (rowid, input_text, translated_text, user_id)
+        VALUES (new.id, new.input_text, new.translated_text, new.user_id);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+        INSERT INTO history_fts (history_fts, rowid, input_text, translated_text, user_id)
+        VALUES ('delete', old.id, old.input_text, old.translated_text, old.user_id);
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE ON history BEGIN
+        INSERT INTO history_fts (history_fts, rowid, input_text, translated_text, user_id)
+        VALUES ('delete', old.id, old.input_text, old.translated_text, old.user_id);
+        INSERT INTO history_fts (rowid, input_text, translated_text, user_id)
+        VALUES (new.id, new.input_text, new.translated_text, new.user_id);
+    END
+    ''')
+    if "history_fts" not in existing:
+        conn.execute("INSERT INTO history_fts (history_fts, rank) VALUES ('rank', 'bm25(1.0, 1.0, 0.0)')")
+    if not {"history_fts", "history_fts_insert", "history_fts_delete", "history_fts_update"} <= existing:
+        # New index, or the history table was recreated and took the triggers with it
+        conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+
+# Schema versions of the app database, applied in order by migrations.migrate(); append
+# new steps, never edit applied ones. Every table is created here, including those of
+# the translation cache, calibration profiles and span metrics.
+HISTORY_MIGRATIONS = [
+    (1, "users and history tables", _create_tables),
+    (2, "history (user_id, date) index", _create_history_indexes),
+    (3, "full-text search index over history", _create_history_search),
+    (4, "translation cache table", create_translation_cache_table),
+    (5, "calibration profiles table", create_calibration_table),
+    (6, "span metrics table", create_span_table),
+]
+
+# Bring the database schema up to date; a no-op costing one PRAGMA read once it is current
+def setup_database():
+    return migrate(HISTORY_MIGRATIONS)
+
+# Split text into words the way the index's tokenizer does
+def _search_words(query):
+    words, current = [], []
+    for char in query:
+        category = unicodedata.category(char)
+        if category[0] in "LN" or category in ("Co", "Mc", "Mn"):
+            current.append(char)
+        elif current:
+            words.append("".join(current))
+            current = []
+    if current:
+        words.append("".join(current))
+    return words
+
+# Turn free text into an FTS5 query: every word must appear in either text column, the
+# last one as a prefix (it may still be being typed). Words are quoted, so FTS5
+# operators typed by the user are taken literally. A prefix longer than the index's
+# prefixes is cut to SEARCH_PREFIX_LENGTH: FTS5 would otherwise read every match of
+# every word starting with it before returning the first row. search_history checks the
+# whole prefix on the rows it gets back.
+def _search_expression(query, user_id):
+    words = _search_words(query)
+    if not words:
+        return None
+    words[-1] = words[-1][:SEARCH_PREFIX_LENGTH]
+    words = ['"' + word + '"' for word in words]
+    words[-1] += "*"
+    return f'user_id : "{int(user_id)}" AND {{input_text translated_text}} : ({" ".join(words)})'
+
+# Case- and (for Latin script) accent-insensitive form of a word, as the tokenizer folds it
+def _fold(word):
+    word = word.casefold()
+    stripped = "".join(char for char in unicodedata.normalize("NFKD", word) if not unicodedata.combining(char))
+    return stripped if stripped.isascii() else word
+
+_word_pattern = None
+
+# Folded words of a stored text, split as by _search_words but with one regex. re's \w
+# leaves out the combining marks Indic scripts are written with, so their ranges are
+# added (found on first use) and "_", which \w includes, is treated as a separator.
+def _document_words(text):
+    global _word_pattern
+    if _word_pattern is None:
+        ranges = []
+        for code in range(0x10000):
+            if unicodedata.category(chr(code)) in ("Co", "Mc", "Mn"):
+                if ranges and ranges[-1][1] == code - 1:
+                    ranges[-1][1] = code
+                else:
+                    ranges.append([code, code])
+        marks = "".join(f"{re.escape(chr(low))}-{re.escape(chr(high))}" for low, high in ranges)
+        _word_pattern = re.compile(f"[\\w{marks}]+")
+    words = _word_pattern.findall(text.casefold().replace("_", " "))
+    return words if text.isascii() else [word if word.isascii() else _fold(word) for word in words]
+
+# BM25 score of each row (input_text and translated_text) for the query words, the last
+# one matched as a prefix. Every candidate matched every word, so the inverse document
+# frequencies are the same for all of them and are left out; what remains ranks rows by
+# how often the words occur relative to the length of the text. With verify_prefix, a
+# row where no word starts with the whole last word scores None.
+def _relevance(rows, words, verify_prefix=False):
+    if not rows:
+        return []
+    words = [_fold(word) for word in words]
+    documents = [(_document_words(row[1] or ""), _document_words(row[2] or "")) for row in rows]
+    averages = [sum(len(document[column]) for document in documents) / len(documents) or 1.0 for column in (0, 1)]
+    scores = []
+    for document in documents:
+        score, prefix_found = 0.0, False
+        for index, word in enumerate(words):
+            prefix = index == len(words) - 1
+            for tokens, average in zip(document, averages):
+                frequency = sum(1 for token in tokens if token.startswith(word)) if prefix else tokens.count(word)
+                if frequency:
+                    prefix_found = prefix_found or prefix
+                    norm = 1 - BM25_B + BM25_B * len(tokens) / average
+                    score += frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+        scores.append(score if prefix_found or not verify_prefix else None)
+    return scores
+
+# One window of search results: the newest `candidates` matches below rowid `before`,
+# ranked by relevance. Returns (ranked, following): ranked is a list of (-score, id, row),
+# best first, and following is where the next window starts (None = no more matches).
+def _search_window(sql, params, words, before, candidates):
+    expression, filters = params[0], params[1:]
+    verify_prefix = len(words[-1]) > SEARCH_PREFIX_LENGTH
+    found = []
+    while len(found) <= candidates:  # One match past the window tells whether another follows
+        batch = fetchall(sql, [expression, before, *filters, candidates + 1])
+        scores = _relevance(batch, words, verify_prefix)
+        found += [(-score, row[0], row) for score, row in zip(scores, batch) if score is not None]
+        if len(batch) <= candidates:
+            break
+        before = batch[-1][0]
+    following = found[candidates - 1][1] if len(found) > candidates else None
+    return sorted(found[:candidates]), following
+
+# Search a user's history. FTS5 finds matches newest first, a window of `candidates` at a
+# time (stopping there, so a common word costs the same however many rows contain it),
+# and each window is ranked by relevance here; SQLite's bm25() would count every match of
+# every word in the table first. Results come best first within a window, windows newest
+# first, paginated with a keyset cursor like get_user_history_page;
+# source_lang, target_lang and conversion_type narrow the results when given.
+# Returns (rows, next_cursor); next_cursor is None once the results are exhausted.
+def search_history(user_id, query, limit=20, cursor=None, source_lang=None, target_lang=None, conversion_type=None,
+                   candidates=SEARCH_CANDIDATES):
+    expression = _search_expression(query, user_id)
+    if expression is None:
+        return [], None
+    if cursor is None:
+        flush_history()  # Include rows still waiting in the write-behind queue
+        before, after = (fetchone("SELECT max(id) FROM history")[0] or 0) + 1, None
+    else:
+        before, after = cursor[2], (tuple(cursor[:2]) if cursor[0] is not None else None)
+    sql = "SELECT h.* FROM history_fts JOIN history h ON h.id = history_fts.rowid WHERE history_fts MATCH ? AND history_fts.rowid < ?"
+    params = [expression]
+    for column, value in (("source_lang", source_lang), ("target_lang", target_lang), ("conversion_type", conversion_type)):
+        if value:
+            sql += f" AND h.{column} = ?"
+            params.append(value)
+    sql += " ORDER BY history_fts.rowid DESC LIMIT ?"
+    words = _search_words(query)
+    rows, next_cursor = [], None
+    while before is not None:
+        ranked, following = _search_window(sql, params, words, before, candidates)
+        if after is not None:
+            ranked = [entry for entry in ranked if entry[:2] > after]
+        taken = ranked[:limit - len(rows)]
+        rows += [entry[2] for entry in taken]
+        if len(taken) < len(ranked):  # The page ends inside this window
+            next_cursor = (taken[-1][0], taken[-1][1], before)  # (rank, id) of the last row, window searched
+            break
+        before, after = following, None
+        if len(rows) == limit:
+            next_cursor = (None, None, before) if before is not None else None  # Resume at the next window
+            break
+    return rows, next_cursor
 
 # Group history records by date for easy review
 def group_history_by_date(user_id):
@@ -61,7 +343,7 @@ def group_history_by_date(user_id):
     grouped_history = {}
 
     for record in history:
-        date = record[5].split(' ')[0]
+        date = str(record[7]).split(' ')[0]  # record[7] is date
         if date not in grouped_history:
             grouped_history[date] = []
         grouped_history[date].append(record)
@@ -70,24 +352,12 @@ def group_history_by_date(user_id):
 
 # Delete history for a user
 def delete_history(user_id):
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute('DELETE FROM history WHERE user_id = ?', (user_id,))
-    conn.commit()
-    conn.close()
+    execute('DELETE FROM history WHERE user_id = ?', (user_id,))
 
 # Get a specific history record by ID
 def get_history_by_id(record_id):
-    conn = sqlite3.connect("users_and_history.db")
-    c = conn.cursor()
-    c.execute('''
-        SELECT id, input_text, translated_text, source_lang, target_lang, action_type, timestamp
+    return fetchone('''
+        SELECT id, input_text, translated_text, source_lang, target_lang, conversion_type, date
         FROM history
         WHERE id = ?
     ''', (record_id,))
-    record = c.fetchone()
-    conn.close()
-    return record
-
-# Call the setup function on startup to ensure the schema is correct
-setup_history_database()
@@ -0,0 +1,260 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date, datetime
+from operator import itemgetter
+
+from database import get_pool
+from history import setup_database, flush_history, get_user_id, _create_history_indexes, _create_history_search
+
+EXPORT_BATCH = 10000  # Rows fetched from the cursor and written at a time
+IMPORT_BATCH = 100000  # Rows inserted per transaction
+COLUMNS = ("id", "input_text", "translated_text", "source_lang", "target_lang", "conversion_type", "user_id", "date")
+FORMATS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+HISTORY_TRIGGERS = ("history_fts_insert", "history_fts_delete", "history_fts_update")
+
+
+# Parquet support is optional: pyarrow is only imported when a .parquet file is used
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as ex:
+        raise ImportError("Parquet export and import need pyarrow (pip install pyarrow)") from ex
+    return pyarrow, pyarrow.parquet
+
+
+def _parquet_schema(pa):
+    return pa.schema([
+        ("id", pa.int64()), ("input_text", pa.string()), ("translated_text", pa.string()),
+        ("source_lang", pa.string()), ("target_lang", pa.string()), ("conversion_type", pa.string()),
+        ("user_id", pa.int64()), ("date", pa.string()),
+    ])
+
+
+def file_format(path, fmt=None):
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ("jsonl", "csv", "parquet"):
+        raise ValueError(f"Unknown history file format for '{path}'; use .jsonl, .csv or .parquet")
+    return fmt
+
+
+# Dates are stored as 'YYYY-MM-DD HH:MM:SS' text, so range bounds compare as text too
+def _date_bound(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# Run a SELECT over history in batches of batch_size, oldest first, from a single cursor
+# so memory stays bounded however large the table is. user_id restricts the rows to one
+# user (served by the (user_id, date) index); start is inclusive and end exclusive.
+def _iter_select(select, user_id=None, start=None, end=None, batch_size=EXPORT_BATCH):
+    flush_history()  # Include rows still waiting in the write-behind queue
+    sql = f"SELECT {select} FROM history"
+    conditions, params = [], []
+    if user_id is not None:
+        conditions.append("user_id = ?")
+        params.append(user_id)
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(_date_bound(start))
+    if end is not None:
+        conditions.append("date < ?")
+        params.append(_date_bound(end))
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY date, id" if user_id is not None else " ORDER BY id"
+    with get_pool().connection() as conn:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+# Stream history rows (tuples in COLUMNS order) in batches; see _iter_select
+def iter_history(user_id=None, start=None, end=None, batch_size=EXPORT_BATCH):
+    return _iter_select(", ".join(COLUMNS), user_id, start, end, batch_size)
+
+
+# SQLite builds each JSON line itself, so Python only joins finished strings
+def _write_jsonl(path, user_id, start, end, batch_size):
+    select = "json_object(" + ", ".join(f"'{column}', {column}" for column in COLUMNS) + ")"
+    count = 0
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for rows in _iter_select(select, user_id, start, end, batch_size):
+            f.write("\n".join([row[0] for row in rows]) + "\n")
+            count += len(rows)
+    return count
+
+
+# Each CSV line is built by SQLite too: printf's %w doubles the quotes inside a text
+# field; text is always quoted and a NULL date is written as an empty string
+def _write_csv(path, user_id, start, end, batch_size):
+    numeric = ("id", "user_id")
+    template = ",".join("%d" if column in numeric else '"%w"' for column in COLUMNS)
+    values = ", ".join(column if column in numeric else f"COALESCE({column}, '')" for column in COLUMNS)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        f.write(",".join(COLUMNS) + "\n")
+        for rows in _iter_select(f"printf('{template}', {values})", user_id, start, end, batch_size):
+            f.write("\n".join([row[0] for row in rows]) + "\n")
+            count += len(rows)
+    return count
+
+
+def _write_parquet(path, user_id, start, end, batch_size):
+    pa, pq = _pyarrow()
+    schema = _parquet_schema(pa)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in iter_history(user_id, start, end, batch_size):
+            columns = list(zip(*rows))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+            count += len(rows)
+    return count
+
+
+# Export history to a JSONL, CSV or Parquet file (picked by extension unless fmt is given).
+# Rows are streamed in batches, so a table of any size is written with memory for one
+# batch. Returns the number of rows written.
+def export_history(path, fmt=None, user_id=None, start=None, end=None, batch_size=EXPORT_BATCH):
+    writer = {"jsonl": _write_jsonl, "csv": _write_csv, "parquet": _write_parquet}[file_format(path, fmt)]
+    return writer(path, user_id, start, end, batch_size)
+
+
+def _read_jsonl(path, batch_size):
+    loads = json.loads
+    with open(path, encoding="utf-8", buffering=1 << 20) as f:
+        rows = []
+        for line in f:
+            if not line.strip():
+                continue
+            rows.append(tuple(map(loads(line).get, COLUMNS)))
+            if len(rows) >= batch_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+
+def _read_csv(path, batch_size):
+    with open(path, encoding="utf-8", newline="", buffering=1 << 20) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing = [column for column in COLUMNS if column not in header and column not in ("id", "date")]
+        if missing:
+            raise ValueError(f"'{path}' has no {', '.join(missing)} column")
+        # Files written by export_history are already in COLUMNS order; others are rearranged
+        if header != list(COLUMNS):
+            header.append(None)  # Absent id or date columns read as the trailing empty field
+            pick = itemgetter(*(header.index(column) if column in header else len(header) - 1 for column in COLUMNS))
+            reader = (pick(record + [""]) for record in reader)
+        rows = []
+        for record in reader:
+            rows.append(record)
+            if len(rows) >= batch_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+
+def _read_parquet(path, batch_size):
+    _, pq = _pyarrow()
+    source = pq.ParquetFile(path)
+    present = [column for column in COLUMNS if column in source.schema_arrow.names]
+    for batch in source.iter_batches(batch_size=batch_size, columns=present):
+        values = {column: batch.column(i).to_pylist() for i, column in enumerate(present)}
+        missing = [None] * batch.num_rows
+        yield list(zip(*(values.get(column, missing) for column in COLUMNS)))
+
+
+# Bulk-load history rows from a file written by export_history.
+# Rows go in with one executemany per transaction of batch_size rows. With
+# defer_indexes the (user_id, date) index and the full-text triggers are dropped for
+# the load and rebuilt once at the end, which is far cheaper than maintaining them row
+# by row; they are restored even if the import fails. keep_ids keeps the exported
+# ids (for moving a whole database to another host; clashing ids abort the import),
+# otherwise new ids are assigned. user_id, when given, overrides the rows' owner.
+# Rows are handed to SQLite exactly as read; the statement itself drops the id, fills
+# in the owner and defaults a missing date, so no Python work is done per row.
+# Returns the number of rows imported.
+def import_history(path, fmt=None, user_id=None, keep_ids=False, defer_indexes=True, batch_size=IMPORT_BATCH, report=print):
+    reader = {"jsonl": _read_jsonl, "csv": _read_csv, "parquet": _read_parquet}[file_format(path, fmt)]
+    setup_database()
+    flush_history()
+    values = [f"?{i}" for i in range(1, len(COLUMNS) + 1)]  # Numbered, so a value can be left unused
+    values[0] = "NULLIF(?1, '')"
+    values[-1] = f"COALESCE(NULLIF(?{len(COLUMNS)}, ''), CURRENT_TIMESTAMP)"
+    if user_id is not None:
+        values[COLUMNS.index("user_id")] = str(int(user_id))
+    columns = COLUMNS if keep_ids else COLUMNS[1:]
+    sql = f"INSERT INTO history ({', '.join(columns)}) SELECT {', '.join(values[len(COLUMNS) - len(columns):])}"
+    count = 0
+    with get_pool().connection() as conn:
+        if defer_indexes:
+            with conn:
+                conn.execute("DROP INDEX IF EXISTS idx_history_user_date")
+                for trigger in HISTORY_TRIGGERS:
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        try:
+            for rows in reader(path, batch_size):
+                with conn:
+                    conn.executemany(sql, rows)
+                count += len(rows)
+                report(f"Imported {count} rows")
+        finally:
+            if defer_indexes:
+                report("Rebuilding history indexes")
+                with conn:
+                    _create_history_indexes(conn)
+                    _create_history_search(conn)  # Recreates the triggers and rebuilds the index
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import translation history as JSONL, CSV or Parquet.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write history to a file")
+    export.add_argument("path", help="output file (.jsonl, .csv or .parquet)")
+    export.add_argument("-u", "--user", help="only this user's history (default: all users)")
+    export.add_argument("--since", help="first date to include, e.g. 2025-01-01")
+    export.add_argument("--until", help="first date to exclude, e.g. 2025-02-01")
+    imports = commands.add_parser("import", help="load history from a file")
+    imports.add_argument("path", help="input file (.jsonl, .csv or .parquet)")
+    imports.add_argument("-u", "--user", help="assign every imported row to this user")
+    imports.add_argument("--keep-ids", action="store_true", help="keep the exported row ids")
+    imports.add_argument("--keep-indexes", action="store_true", help="maintain indexes row by row instead of rebuilding them")
+    for command in (export, imports):
+        command.add_argument("--format", choices=("jsonl", "csv", "parquet"), help="file format (default: from the extension)")
+        command.add_argument("--batch-size", type=int, help="rows per batch")
+    args = parser.parse_args(argv)
+
+    setup_database()
+    user_id = None
+    if args.user:
+        user_id = get_user_id(args.user)
+        if user_id is None:
+            parser.error(f"unknown user '{args.user}'")
+
+    if args.command == "export":
+        count = export_history(args.path, args.format, user_id, args.since, args.until, args.batch_size or EXPORT_BATCH)
+        print(f"Exported {count} rows to {args.path}")
+    else:
+        count = import_history(args.path, args.format, user_id, args.keep_ids, not args.keep_indexes, args.batch_size or IMPORT_BATCH)
+        print(f"Imported {count} rows from {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+from database import executemany, execute
+from metrics import span
+
+BATCH_SIZE = 256  # Rows committed together at most
+FLUSH_INTERVAL = 0.2  # Seconds a row may wait for company before it is committed
+MAX_QUEUE = 10000  # Rows waiting to be written; producers block beyond this
+PUT_TIMEOUT = 5.0  # Seconds a producer waits for queue space before WriterQueueFull
+WRITE_RETRIES = 6  # Extra attempts at a write that failed with a transient error
+RETRY_DELAY = 0.05  # First retry waits this long; doubles per attempt
+
+
+_FLUSH = object()  # Queued by flush(): write what has been collected without waiting
+
+
+class WriterQueueFull(RuntimeError):
+    pass
+
+
+# Errors that go away by waiting: another connection holds the write lock, or every
+# pooled connection is in use
+def is_transient(ex):
+    if isinstance(ex, sqlite3.OperationalError):
+        message = str(ex)
+        return "locked" in message or "busy" in message
+    return isinstance(ex, TimeoutError)
+
+
+# Write-behind inserts for one statement: callers enqueue parameter tuples and return
+# immediately; a background thread commits them in groups with executemany, one
+# transaction (and one sync) per group. A group is written when it reaches batch_size
+# rows or its oldest row has waited flush_interval, and everything left is written on
+# flush()/close() and at interpreter exit.
+class WriteBehindWriter:
+    def __init__(self, sql, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE,
+                 put_timeout=PUT_TIMEOUT, name="write-behind"):
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.name = name
+        self.max_queue = max_queue
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.retried = 0
+        self._queue = queue.Queue()
+        self._space = threading.BoundedSemaphore(max_queue)  # Free places in the queue
+        self._progress = threading.Condition()
+        self._submitted = 0  # Rows queued so far; rows leave the queue in this order
+        self._done = 0  # Rows the writer has finished with, committed or dropped
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Queue one row; blocks while the queue is full (backpressure), up to put_timeout
+    def submit(self, params):
+        if self._closed:
+            raise RuntimeError(f"{self.name} writer is closed")
+        if not self._space.acquire(timeout=self.put_timeout):
+            raise WriterQueueFull(f"{self.name} writer is {self.max_queue} rows behind")
+        with self._progress:  # Numbering and queueing together keep the queue in row order
+            self._queue.put(tuple(params))
+            self._submitted += 1
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # Collect the next group: wait for a first row, then up to batch_size rows or
+    # until the first one has waited flush_interval, or a flush() asks for it now.
+    # Returns (rows, stopping).
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        if first is _FLUSH:
+            return [], False
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                return batch, True
+            if row is _FLUSH:
+                return batch, False
+            batch.append(row)
+        return batch, False
+
+    # Run a write, retrying transient errors with exponential backoff
+    def _retrying(self, write, params):
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                return write(self.sql, params)
+            except Exception as ex:
+                if not is_transient(ex) or attempt == WRITE_RETRIES:
+                    raise
+                self.retried += 1
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+
+    def _write(self, batch):
+        with span("db_write", size=len(batch)) as s:
+            try:
+                self._retrying(executemany, batch)
+                self.written += len(batch)
+            except Exception as ex:
+                # One bad row must not take the whole group down with it
+                s.outcome = "partial"
+                print(f"{self.name}: group commit failed ({ex}); writing rows one by one")
+                for params in batch:
+                    try:
+                        self._retrying(execute, params)
+                        self.written += 1
+                    except Exception as row_error:
+                        self.failed += 1
+                        print(f"{self.name}: dropped row: {row_error}")
+            self.batches += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            try:
+                if batch:
+                    self._write(batch)
+            finally:
+                if batch:
+                    self._space.release(len(batch))
+                with self._progress:
+                    self._done += len(batch)
+                    self._progress.notify_all()
+
+    # Block until every row queued before the call is committed (rows other threads
+    # queue meanwhile are not waited for); a group still being collected is written
+    # right away rather than after flush_interval
+    def flush(self):
+        with self._progress:
+            target = self._submitted
+            if self._done >= target:
+                return
+        self._queue.put(_FLUSH)
+        with self._progress:
+            self._progress.wait_for(lambda: self._done >= target)
+
+    # Write what is queued and stop the background thread
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {"written": self.written, "batches": self.batches, "failed": self.failed, "retried": self.retried,
+                "pending": self.pending()}
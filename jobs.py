@@ -0,0 +1,152 @@
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+MAX_PENDING = 16  # Jobs queued or running before submit() starts refusing work
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# Handle for a unit of background work: status, progress messages, cancellation and result
+class Job:
+    _ids = itertools.count(1)
+
+    def __init__(self, name, on_progress=None):
+        self.id = next(Job._ids)
+        self.name = name
+        self.status = "queued"
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.on_progress = on_progress
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+
+    @property
+    def cancel_event(self):
+        return self._cancel_event
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def done(self):
+        return self._done_event.is_set()
+
+    # Ask the job to stop; long-running steps check cancel_event and wind down
+    def cancel(self):
+        self._cancel_event.set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.name)
+
+    # Publish a progress message to whoever is watching the job
+    def report(self, message):
+        self.message = message
+        if self.on_progress is not None:
+            try:
+                self.on_progress(message)
+            except Exception as ex:
+                print(f"Progress callback error: {ex}")
+
+    def wait(self, timeout=None):
+        self._done_event.wait(timeout)
+        return self.result
+
+    def _finish(self, status, result=None, error=None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self._done_event.set()
+
+
+# Runs jobs on a thread pool with a bound on how much work can be outstanding
+class JobExecutor:
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    # Run fn(job, *args, **kwargs) in the background and return its Job handle.
+    # on_done(job) is called from the worker thread when the job finishes, whatever the outcome.
+    def submit(self, name, fn, *args, on_progress=None, on_done=None, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"Too many jobs in progress; '{name}' was not started")
+        job = Job(name, on_progress)
+        try:
+            future = self._pool.submit(self._run, job, fn, args, kwargs, on_done)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(functools.partial(self._on_future_done, job, on_done))
+        return job
+
+    def _run(self, job, fn, args, kwargs, on_done):
+        try:
+            if job.cancelled:
+                job._finish("cancelled")
+            else:
+                job.status = "running"
+                job._finish("done", result=fn(job, *args, **kwargs))
+        except JobCancelled:
+            job._finish("cancelled")
+        except Exception as ex:
+            job._finish("failed", error=ex)
+        finally:
+            self._slots.release()
+            self._notify(on_done, job)
+
+    # A job whose future was cancelled before it started (see shutdown) never reaches
+    # _run; finish it here so waiters wake up and its slot is returned
+    def _on_future_done(self, job, on_done, future):
+        if future.cancelled():
+            job.cancel()
+            job._finish("cancelled")
+            self._slots.release()
+            self._notify(on_done, job)
+
+    @staticmethod
+    def _notify(on_done, job):
+        if on_done is not None:
+            try:
+                on_done(job)
+            except Exception as ex:
+                print(f"Job completion callback error: {ex}")
+
+    # Stop taking work; jobs still queued finish as "cancelled" without running
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Get the process-wide job executor
+def get_job_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = JobExecutor()
+    return _executor
+
+
+# Replace the process-wide executor with one of another size; call at startup, before
+# any jobs are submitted (server mode, load tests)
+def configure_job_executor(max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+    global _executor
+    with _executor_lock:
+        previous, _executor = _executor, JobExecutor(max_workers, max_pending)
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _executor
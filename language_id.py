@@ -0,0 +1,80 @@
+import threading
+
+from metrics import span
+from translation_cache import LRUCache, normalize_text
+
+DETECT_SEED = 0  # langdetect samples randomly; a fixed seed makes results repeatable
+CACHE_SIZE = 4096
+
+_factory = None
+_factory_lock = threading.Lock()
+_cache = LRUCache(max_size=CACHE_SIZE, ttl=None)
+
+
+# Load langdetect's language profiles once, with the seed set, and return the factory
+def get_detector_factory():
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                import langdetect.detector_factory as detector_factory
+
+                detector_factory.DetectorFactory.seed = DETECT_SEED
+                detector_factory.init_factory()
+                _factory = detector_factory._factory
+    return _factory
+
+
+# Load the profiles on a background thread so the first detection does not pay for it
+def preload():
+    threading.Thread(target=get_detector_factory, daemon=True).start()
+
+
+# "hi-IN" -> "hi", matching what langdetect reports ("zh-cn"/"zh-tw" are kept whole)
+def language_from_hint(language):
+    language = language.lower().replace("_", "-")
+    return language if language in ("zh-cn", "zh-tw") else language.split("-")[0]
+
+
+def _detect_uncached(key):
+    from langdetect.lang_detect_exception import LangDetectException
+
+    detector = get_detector_factory().create()
+    detector.append(key)
+    try:
+        return detector.detect()
+    except LangDetectException:  # No usable features, e.g. only digits or punctuation
+        return None
+
+
+# Language of `text` as a langdetect code, or None if it cannot be determined.
+# When the recognizer was told the language (`hint`), that answer is used directly.
+def detect_language(text, hint=None):
+    if hint:
+        return language_from_hint(hint)
+    key = normalize_text(text).lower()
+    if not key:
+        return None
+    with span("language_detection", size=len(key)) as s:
+        language = _cache.get(key)
+        if language is not None:
+            s.outcome = "cached"
+            return language
+        language = _detect_uncached(key)
+        if language is not None:
+            _cache.put(key, language)
+        else:
+            s.outcome = "undetected"
+        return language
+
+
+# Detect many texts at once: duplicates are detected once and cached entries skipped
+def detect_languages(texts, hint=None):
+    if hint:
+        return [language_from_hint(hint)] * len(texts)
+    results = {}
+    for text in texts:
+        key = normalize_text(text).lower()
+        if key not in results:
+            results[key] = detect_language(key)
+    return [results[normalize_text(text).lower()] for text in texts]
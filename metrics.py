@@ -0,0 +1,262 @@
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = 9464  # Local port for the /metrics endpoint (None = no endpoint)
+METRICS_HOST = "127.0.0.1"
+PERSIST_SPANS = False  # Also write every span to the span_metrics table
+# Histogram bucket upper bounds in seconds, roughly logarithmic from 1 ms to 2 min
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SPAN_FLUSH_INTERVAL = 2.0  # Seconds between writes of queued spans to SQLite
+SPAN_QUEUE_SIZE = 10000  # Spans beyond this are dropped rather than slowing the app
+
+
+# Cumulative latency histogram with fixed buckets; percentiles are interpolated
+# within the bucket they fall in
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot: above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+
+# Per-stage aggregates: a duration histogram, outcome counts and payload bytes
+class StageStats:
+    def __init__(self):
+        self.durations = Histogram()
+        self.outcomes = {}
+        self.size = 0
+
+    def summary(self):
+        h = self.durations
+        return {
+            "count": h.count,
+            "p50": h.percentile(0.50),
+            "p90": h.percentile(0.90),
+            "p99": h.percentile(0.99),
+            "max": h.max,
+            "mean": h.sum / h.count if h.count else None,
+            "outcomes": dict(self.outcomes),
+            "size": self.size,
+        }
+
+
+# One timed stage. Set .size (bytes, characters, rows...) and .outcome while it runs;
+# an exception escaping the span marks it "error" unless another outcome was set.
+class Span:
+    __slots__ = ("stage", "size", "outcome", "started_at", "duration")
+
+    def __init__(self, stage, size=None):
+        self.stage = stage
+        self.size = size
+        self.outcome = "ok"
+        self.started_at = time.time()
+        self.duration = None
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._sink = None
+
+    def record(self, span):
+        with self._lock:
+            stats = self._stages.get(span.stage)
+            if stats is None:
+                stats = self._stages[span.stage] = StageStats()
+            stats.durations.observe(span.duration)
+            stats.outcomes[span.outcome] = stats.outcomes.get(span.outcome, 0) + 1
+            stats.size += span.size or 0
+        if self._sink is not None:
+            self._sink.put(span)
+
+    def summary(self):
+        with self._lock:
+            return {stage: stats.summary() for stage, stats in sorted(self._stages.items())}
+
+    # Prometheus text exposition format
+    def prometheus(self):
+        lines = ["# TYPE stage_duration_seconds histogram"]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, stats in stages:
+                h = stats.durations
+                cumulative = 0
+                for bound, bucket_count in zip(h.buckets, h.counts):
+                    cumulative += bucket_count
+                    lines.append(f'stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'stage_duration_seconds_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+            lines.append("# TYPE stage_outcomes_total counter")
+            for stage, stats in stages:
+                for outcome, count in sorted(stats.outcomes.items()):
+                    lines.append(f'stage_outcomes_total{{stage="{stage}",outcome="{outcome}"}} {count}')
+            lines.append("# TYPE stage_payload_size_total counter")
+            for stage, stats in stages:
+                lines.append(f'stage_payload_size_total{{stage="{stage}"}} {stats.size}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+# Time a block as one stage:  with span("translation", size=len(text)) as s: ...
+@contextmanager
+def span(stage, size=None):
+    current = Span(stage, size)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        if current.outcome == "ok":
+            current.outcome = "error"
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _registry.record(current)
+
+
+# Decorator form of span(); `size` optionally computes the payload size from the arguments
+def traced(stage, size=None):
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, size(*args, **kwargs) if size else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Table SpanTableSink writes to; applied as a schema migration (history.HISTORY_MIGRATIONS)
+def create_span_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS span_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        stage TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        duration REAL NOT NULL,
+        size INTEGER,
+        outcome TEXT NOT NULL
+    )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_span_metrics_stage_started ON span_metrics (stage, started_at)")
+
+
+# Writes finished spans to the span_metrics table in batches on a background thread
+class SpanTableSink:
+    def __init__(self, flush_interval=SPAN_FLUSH_INTERVAL, max_queue=SPAN_QUEUE_SIZE):
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        threading.Thread(target=self._run, name="span-sink", daemon=True).start()
+
+    def put(self, span):
+        try:
+            self._queue.put_nowait((span.stage, span.started_at, span.duration, span.size, span.outcome))
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                return rows
+
+    def flush(self):
+        from database import executemany
+
+        rows = self._drain()
+        if rows:
+            executemany("INSERT INTO span_metrics (stage, started_at, duration, size, outcome) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as ex:
+                print(f"Could not write span metrics: {ex}")
+
+
+# Start persisting spans to SQLite (idempotent)
+def enable_span_table(flush_interval=SPAN_FLUSH_INTERVAL):
+    if _registry._sink is None:
+        _registry._sink = SpanTableSink(flush_interval)
+    return _registry._sink
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = _registry.prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(_registry.summary(), indent=2).encode("utf-8"), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+# Serve /metrics (Prometheus) and /metrics.json (p50/p90/p99 per stage) on a
+# background thread; returns the server, or None if the port is taken
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    global _server
+    if _server is None:
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as ex:
+            print(f"Metrics endpoint not started: {ex}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,35 @@
+from database import get_pool
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Bring the database schema up to date.
+# `steps` is an ordered list of (version, description, apply) where apply(conn) makes
+# the changes for that version. The version reached is stored in PRAGMA user_version;
+# each pending step runs once, in its own transaction together with the version bump,
+# so a failed step leaves the database at the previous version. When the schema is
+# already current this costs a single PRAGMA read.
+def migrate(steps, pool=None, report=print):
+    pool = pool or get_pool()
+    latest = steps[-1][0] if steps else 0
+    with pool.connection() as conn:
+        if schema_version(conn) >= latest:
+            return latest
+        if conn.in_transaction:
+            conn.commit()
+        for version, description, apply in steps:
+            conn.execute("BEGIN IMMEDIATE")  # Take the write lock before re-reading the version
+            try:
+                if schema_version(conn) >= version:  # Already applied, possibly by another process
+                    conn.execute("COMMIT")
+                    continue
+                report(f"Migrating database to version {version}: {description}")
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return schema_version(conn)
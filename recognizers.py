@@ -0,0 +1,230 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import speech_recognition as sr
+
+BACKEND_TIMEOUT = 10.0  # Seconds before the router gives up on a backend and falls back
+SHORT_CLIP_SECONDS = 0.0  # Clips up to this long stay on a local engine when one can handle them (0 = off)
+LATENCY_SMOOTHING = 0.3  # Weight of the newest sample in the moving latency average
+FAILURES_BEFORE_COOLDOWN = 3
+COOLDOWN_SECONDS = 30.0  # How long an unhealthy backend is tried only after healthy ones
+RANK_PENALTY = 1.0  # Seconds of latency one accuracy tier is worth when ordering backends
+
+
+# Speech recognition engine interface. recognize() returns (transcript, confidence),
+# raises sr.UnknownValueError when nothing was recognized and sr.RequestError when
+# the engine itself failed. `local` engines run on this machine with no network.
+class RecognizerBackend:
+    name = "base"
+    local = False
+    languages = None  # None = any language; otherwise a set of lowercase language tags
+    rank = 0  # Accuracy tier; each tier counts as RANK_PENALTY seconds of extra latency
+    expected_latency = 1.0  # Prior for routing before any latency has been measured
+    fallback_language = None  # Language assumed when tried as a last resort on audio of unknown language
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+        self.latency = None
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        self._lock = threading.Lock()
+
+    def available(self):
+        return True
+
+    # A fixed-language engine never gets audio of unknown language (language=None)
+    def supports(self, language):
+        if self.languages is None:
+            return True
+        if language is None:
+            return False
+        language = language.lower()
+        return language in self.languages or language.split("-")[0] in self.languages
+
+    def healthy(self):
+        return time.monotonic() >= self.unhealthy_until
+
+    def estimated_latency(self):
+        return self.latency if self.latency is not None else self.expected_latency
+
+    # Routing cost: measured latency plus a penalty per accuracy tier, so a less accurate
+    # engine wins only when it is faster by more than the penalty
+    def cost(self):
+        return self.estimated_latency() + self.rank * RANK_PENALTY
+
+    def record_success(self, seconds):
+        with self._lock:
+            self.latency = seconds if self.latency is None else (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * seconds
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= FAILURES_BEFORE_COOLDOWN:
+                self.unhealthy_until = time.monotonic() + COOLDOWN_SECONDS
+                self.failures = 0
+
+    def recognize(self, audio_data, language=None):
+        raise NotImplementedError
+
+
+# Google Web Speech API: best accuracy, needs the network
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+
+    def recognize(self, audio_data, language=None):
+        result = self.recognizer.recognize_google(audio_data, language=language, show_all=True) if language else self.recognizer.recognize_google(audio_data, show_all=True)
+        alternatives = result.get("alternative", []) if isinstance(result, dict) else []
+        if not alternatives:
+            raise sr.UnknownValueError()
+        best = alternatives[0]  # Alternatives come ranked; only the first carries a confidence
+        return best["transcript"], best.get("confidence")
+
+
+# CMU Sphinx via pocketsphinx: offline, English only, lower accuracy
+class SphinxBackend(RecognizerBackend):
+    name = "sphinx"
+    local = True
+    languages = {"en", "en-us"}
+    fallback_language = "en-US"
+    rank = 1
+    expected_latency = 0.5
+
+    def available(self):
+        try:
+            import pocketsphinx  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def recognize(self, audio_data, language=None):
+        transcript = self.recognizer.recognize_sphinx(audio_data, language="en-US")
+        if not transcript:
+            raise sr.UnknownValueError()
+        return transcript, None
+
+
+# Deterministic local stand-in for tests and benchmarks: the transcript is looked up
+# by a hash of the raw audio, falling back to a fixed default; no network, no model
+class StubBackend(RecognizerBackend):
+    name = "stub"
+    local = True
+    rank = 2
+    expected_latency = 0.0
+
+    def __init__(self, transcripts=None, default="stub transcript", delay=0.0):
+        super().__init__()
+        self.transcripts = transcripts or {}
+        self.default = default
+        self.delay = delay
+
+    @staticmethod
+    def audio_key(audio_data):
+        return hashlib.sha1(audio_data.get_raw_data()).hexdigest()
+
+    def recognize(self, audio_data, language=None):
+        if self.delay:
+            time.sleep(self.delay)
+        transcript = self.transcripts.get(self.audio_key(audio_data), self.default)
+        if not transcript:
+            raise sr.UnknownValueError()
+        return transcript, 1.0
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def register_backend(backend):
+    with _registry_lock:
+        _registry[backend.name] = backend
+    return backend
+
+
+def unregister_backend(name):
+    with _registry_lock:
+        _registry.pop(name, None)
+
+
+def get_backend(name):
+    return _registry[name]
+
+
+def registered_backends():
+    with _registry_lock:
+        return list(_registry.values())
+
+
+def clip_seconds(audio_data):
+    return len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+
+
+# Picks a backend per request by language support, health and measured latency,
+# and falls back to the next candidate when one times out or errors. A backend that
+# answers "no speech recognized" is final: another engine would only guess.
+class RecognizerRouter:
+    def __init__(self, backends=None, timeout=BACKEND_TIMEOUT, short_clip_seconds=SHORT_CLIP_SECONDS):
+        self._backends = backends  # None = use the registry
+        self.timeout = timeout
+        self.short_clip_seconds = short_clip_seconds
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="backend")
+
+    def backends(self):
+        return self._backends if self._backends is not None else registered_backends()
+
+    # Backends to try, best first: healthy before cooling down, then (for short clips,
+    # if enabled) local before remote, then lowest cost. For audio of unknown language,
+    # fixed-language engines with a fallback_language come after all the others, so an
+    # offline engine still answers when the network backends time out or fail.
+    def candidates(self, audio_data, language=None):
+        available = [b for b in self.backends() if b.available()]
+        usable = [b for b in available if b.supports(language)]
+        short_clip = self.short_clip_seconds and clip_seconds(audio_data) <= self.short_clip_seconds
+        ranked = sorted(usable, key=lambda b: (not b.healthy(), not (short_clip and b.local), b.cost()))
+        if language is None:
+            fallbacks = [b for b in available if b not in usable and b.fallback_language is not None]
+            ranked += sorted(fallbacks, key=lambda b: (not b.healthy(), b.cost()))
+        return ranked
+
+    def recognize(self, audio_data, language=None):
+        candidates = self.candidates(audio_data, language)
+        if not candidates:
+            raise sr.RequestError(f"No recognizer backend available for language {language!r}")
+        for backend in candidates:
+            start = time.monotonic()
+            future = self._pool.submit(backend.recognize, audio_data, language or backend.fallback_language)
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                print(f"Recognizer '{backend.name}' timed out; falling back.")
+                backend.record_failure()
+                continue
+            except sr.UnknownValueError:
+                backend.record_success(time.monotonic() - start)  # Healthy, just no speech recognized
+                raise
+            except Exception as ex:
+                print(f"Recognizer '{backend.name}' failed: {ex}")
+                backend.record_failure()
+                continue
+            backend.record_success(time.monotonic() - start)
+            return result
+        raise sr.RequestError("All recognizer backends failed")
+
+
+register_backend(GoogleBackend())
+register_backend(SphinxBackend())
+
+_router = None
+_router_lock = threading.Lock()
+
+
+# Get the process-wide router over the registered backends
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = RecognizerRouter()
+    return _router
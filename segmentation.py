@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from language_id import detect_languages
+from transcription import transcribe_best, load_audio, FAN_OUT
+
+MIN_SILENCE_MS = 500  # A pause at least this long ends a segment
+SILENCE_OFFSET_DB = -16  # Silence threshold relative to the clip's average loudness
+KEEP_SILENCE_MS = 200  # Padding kept around each segment so words are not clipped
+MAX_SEGMENT_MS = 15000  # Longer stretches of speech are cut into pieces of this size
+SEGMENT_WORKERS = 4
+SEGMENT_FAN_OUT = 1  # Recognition attempts per segment when there are several; the pool runs them in parallel
+DEFAULT_LANGUAGE = "en"  # What the recognizers assume when they are given no language
+
+
+# Load a path, file object, sr.AudioData or AudioSegment as a mono AudioSegment.
+# WAV, AIFF and FLAC are decoded by speech_recognition; other formats go through
+# pydub, which needs ffmpeg.
+def load_segment(audio):
+    from pydub import AudioSegment
+
+    if isinstance(audio, AudioSegment):
+        return audio.set_channels(1)
+    if not isinstance(audio, sr.AudioData):
+        try:
+            audio = load_audio(audio)
+        except ValueError:  # Not WAV, AIFF or FLAC
+            if hasattr(audio, "seek"):
+                audio.seek(0)
+            return AudioSegment.from_file(audio).set_channels(1)
+    return AudioSegment(data=audio.get_raw_data(), sample_width=audio.sample_width, frame_rate=audio.sample_rate, channels=1)
+
+
+# Find (start_ms, end_ms) spans of speech, splitting on silence and capping each span's length
+def find_speech_ranges(segment, min_silence_ms=MIN_SILENCE_MS, silence_offset_db=SILENCE_OFFSET_DB,
+                       keep_silence_ms=KEEP_SILENCE_MS, max_segment_ms=MAX_SEGMENT_MS):
+    from pydub.silence import detect_nonsilent
+
+    if len(segment) == 0:
+        return []
+    if segment.dBFS == float("-inf"):
+        return []  # Digital silence
+    ranges = []
+    for start, end in detect_nonsilent(segment, min_silence_len=min_silence_ms, silence_thresh=segment.dBFS + silence_offset_db):
+        start = max(0, start - keep_silence_ms)
+        end = min(len(segment), end + keep_silence_ms)
+        while end - start > max_segment_ms:
+            ranges.append((start, start + max_segment_ms))
+            start += max_segment_ms
+        ranges.append((start, end))
+    return ranges
+
+
+def _range_audio(segment, start, end):
+    piece = segment[start:end]
+    return sr.AudioData(piece.raw_data, piece.frame_rate, piece.sample_width)
+
+
+def _transcribe_range(segment, start, end, language, policy):
+    return transcribe_best(_range_audio(segment, start, end), language, **policy)
+
+
+# Per-segment language identification for audio of unknown language. Each segment's
+# first transcript goes through detect_languages, and a segment detected as another
+# language than DEFAULT_LANGUAGE is recognized again in that language, so a recording
+# that switches languages is not transcribed as one. Sets each segment's "language";
+# audio_for(segment) returns its sr.AudioData. Runs on `pool` when given.
+def recognize_detected_languages(segments, audio_for, policy=None, pool=None):
+    policy = policy or {}
+    redo = []
+    for segment, language in zip(segments, detect_languages([s["text"] for s in segments])):
+        segment["language"] = language
+        if segment["text"] and language and language != DEFAULT_LANGUAGE:
+            redo.append(segment)
+
+    def recognize(segment):
+        try:
+            return transcribe_best(audio_for(segment), segment["language"], **policy)
+        except Exception as ex:
+            print(f"Segment {segment['index']} failed in {segment['language']}: {ex}")
+            return None
+
+    for segment, result in zip(redo, (pool.map if pool is not None else map)(recognize, redo)):
+        if result and result[0]:
+            segment["text"], segment["confidence"] = result
+
+
+# Split audio on silence, transcribe the pieces in parallel and stitch them back in order.
+# Returns a list of {"index", "start", "end", "text", "confidence"} dicts with times in
+# seconds; segments that could not be recognized have empty text. A clip that is a
+# single segment keeps the full hedged fan-out of transcribe_best. Without a language,
+# each segment's language is detected (see recognize_detected_languages) and stored
+# under "language".
+def transcribe_segments(audio, language=None, max_workers=SEGMENT_WORKERS, cancel_event=None, **policy):
+    policy["cancel_event"] = cancel_event
+    segment = load_segment(audio)
+    ranges = find_speech_ranges(segment)
+    policy.setdefault("fan_out", FAN_OUT if len(ranges) == 1 else SEGMENT_FAN_OUT)
+    print(f"Split audio into {len(ranges)} segment(s).")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="segment") as pool:
+        futures = [pool.submit(_transcribe_range, segment, start, end, language, policy) for start, end in ranges]
+        segments = []
+        for index, ((start, end), future) in enumerate(zip(ranges, futures)):
+            if cancel_event is not None and cancel_event.is_set():
+                for pending in futures[index:]:
+                    pending.cancel()
+                break
+            try:
+                text, confidence = future.result()
+            except Exception as ex:
+                print(f"Segment {index} failed: {ex}")
+                text, confidence = "", None
+            segments.append({"index": index, "start": start / 1000, "end": end / 1000, "text": text, "confidence": confidence})
+        if language is None and not (cancel_event is not None and cancel_event.is_set()):
+            recognize_detected_languages(segments, lambda s: _range_audio(segment, *ranges[s["index"]]), policy, pool)
+    return segments
+
+
+# Join segment texts into a single transcript
+def join_segments(segments):
+    return " ".join(s["text"] for s in segments if s["text"])
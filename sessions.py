@@ -0,0 +1,228 @@
+import base64
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+
+import speech_recognition as sr
+
+from jobs import get_job_executor, configure_job_executor, JobQueueFull
+from tts_stream import split_sentences, synthesize_chunk
+
+MAX_SESSIONS = 200  # Open sessions before new visitors are turned away
+SESSION_MAX_JOBS = 8  # Jobs one session may have queued or running in the shared pool
+SERVER_WORKERS = 16  # Size of the shared job pool in server mode
+SERVER_MAX_PENDING = 64  # Jobs queued or running across all sessions in server mode
+CLIP_TIMEOUT = 120.0  # Longest wait for a browser to finish playing one clip
+CLOSE_TIMEOUT = 30.0  # Longest a closed session's jobs may run before its scratch files go
+
+
+class TooManySessions(RuntimeError):
+    pass
+
+
+# Plays speech in one user's browser through a Flet Audio control, so in server mode
+# every session hears only its own audio and nothing competes for the server's mixer.
+class BrowserPlayer:
+    def __init__(self, page):
+        self.page = page
+        self._clip = None
+        self._finished = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    # Start playing mp3 bytes; returns an Event that is set when the clip ends or is stopped
+    def start(self, mp3):
+        import flet as ft
+
+        finished = threading.Event()
+
+        def on_state_changed(e):
+            if e.data in ("completed", "disposed"):
+                finished.set()
+
+        clip = ft.Audio(src_base64=base64.b64encode(mp3).decode("ascii"), autoplay=True, on_state_changed=on_state_changed)
+        with self._lock:
+            self._remove_clip()
+            self._clip, self._finished = clip, finished
+            self.page.overlay.append(clip)
+        self.page.update()
+        return finished
+
+    def play(self, mp3):
+        generation = self._generation
+        self.start(mp3).wait(CLIP_TIMEOUT)
+        if generation == self._generation:
+            self.stop()
+
+    # Speak text sentence by sentence; the next sentence is synthesized while the
+    # browser plays the current one
+    def speak(self, text, lang, synthesize=synthesize_chunk):
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        generation = self._generation
+        audio = synthesize(sentences[0], lang)
+        for index in range(len(sentences)):
+            if generation != self._generation:
+                return  # Stopped
+            finished = self.start(audio)
+            audio = synthesize(sentences[index + 1], lang) if index + 1 < len(sentences) else None
+            finished.wait(CLIP_TIMEOUT)
+        if generation == self._generation:
+            self.stop()
+
+    def stop(self):
+        with self._lock:
+            self._generation += 1
+            removed = self._remove_clip()
+        if removed:
+            self.page.update()
+
+    def _remove_clip(self):
+        if self._clip is None:
+            return False
+        self._finished.set()
+        if self._clip in self.page.overlay:
+            self.page.overlay.remove(self._clip)
+        self._clip = self._finished = None
+        return True
+
+
+# State owned by one user session: a recognizer of its own (so calibrating one
+# session's energy_threshold never affects another), a scratch directory for any audio
+# it writes to disk, and its share of the shared job pool.
+class Session:
+    def __init__(self, session_id, executor=None, scratch_root=None, max_jobs=SESSION_MAX_JOBS, number=0):
+        self.id = session_id
+        self.recognizer = sr.Recognizer()
+        self.user_name = None
+        self.user_id = None  # Set at login, so the users table is not queried per translation
+        self.player = None  # BrowserPlayer in server mode; None plays through pygame
+        self.scratch_dir = tempfile.mkdtemp(prefix=f"session-{number}-", dir=scratch_root)
+        self.executor = executor or get_job_executor()
+        self.max_jobs = max_jobs
+        self.closed = False
+        self._jobs = []
+        self._lock = threading.Lock()
+
+    # Path for a file in this session's scratch directory
+    def scratch_path(self, name):
+        return os.path.join(self.scratch_dir, os.path.basename(name))
+
+    # Run fn(job) on the shared pool; raises JobQueueFull when this session already has
+    # max_jobs in progress, so one busy session cannot take the whole pool
+    def submit(self, name, fn, on_progress=None, on_done=None):
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Session {self.id} is closed")
+            self._jobs = [job for job in self._jobs if not job.done]
+            if len(self._jobs) >= self.max_jobs:
+                raise JobQueueFull(f"{len(self._jobs)} jobs already in progress; '{name}' was not started")
+            job = self.executor.submit(name, fn, on_progress=on_progress, on_done=on_done)
+            self._jobs.append(job)
+        return job
+
+    def active_jobs(self):
+        with self._lock:
+            return [job for job in self._jobs if not job.done]
+
+    def cancel_jobs(self):
+        for job in self.active_jobs():
+            job.cancel()
+        if self.player is not None:
+            self.player.stop()
+
+    # Cancel outstanding work and remove the scratch directory once it has wound down
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        jobs = self.active_jobs()
+        self.cancel_jobs()
+
+        def cleanup():
+            for job in jobs:
+                job.wait(CLOSE_TIMEOUT)
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+        if jobs:
+            threading.Thread(target=cleanup, name=f"session-{self.id}-cleanup", daemon=True).start()
+        else:
+            cleanup()
+
+
+# Registry of open sessions, keyed by the Flet page's session id
+class SessionManager:
+    def __init__(self, max_sessions=MAX_SESSIONS, max_jobs=SESSION_MAX_JOBS, scratch_root=None):
+        self.max_sessions = max_sessions
+        self.max_jobs = max_jobs
+        self.scratch_root = scratch_root
+        self.opened = 0
+        self.rejected = 0
+        self._sessions = {}
+        self._numbers = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def open(self, session_id=None):
+        with self._lock:
+            if session_id in self._sessions:
+                return self._sessions[session_id]
+            if len(self._sessions) >= self.max_sessions:
+                self.rejected += 1
+                raise TooManySessions(f"{len(self._sessions)} sessions are open; try again later")
+            number = next(self._numbers)
+            session_id = session_id or str(number)
+            session = Session(session_id, scratch_root=self.scratch_root, max_jobs=self.max_jobs, number=number)
+            self._sessions[session_id] = session
+            self.opened += 1
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def close_all(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        return {"open": len(self), "opened": self.opened, "rejected": self.rejected, "max_sessions": self.max_sessions}
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+# Get the process-wide session registry
+def get_session_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = SessionManager()
+    return _manager
+
+
+# Size the shared job pool and the session registry for many concurrent users.
+# Call once at startup, before the first session opens.
+def configure_server(workers=SERVER_WORKERS, max_pending=SERVER_MAX_PENDING, max_sessions=MAX_SESSIONS,
+                     max_jobs=SESSION_MAX_JOBS, scratch_root=None):
+    global _manager
+    configure_job_executor(workers, max_pending)
+    with _manager_lock:
+        _manager = SessionManager(max_sessions, max_jobs, scratch_root)
+    return _manager
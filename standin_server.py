@@ -0,0 +1,119 @@
+# Local stand-in for the translation and TTS services, for tests and benchmarks.
+# Speaks a small JSON protocol over HTTP:
+#   POST /translate {"text", "source", "target"} -> {"translatedText": "[target] text"}
+#   POST /tts {"text", "lang"} -> deterministic fake mp3 bytes
+# Latency, throttling (429) and server errors (503) can be injected to exercise the
+# client layer in clients.py. Run directly to serve on a fixed port:
+#   python standin_server.py [port]
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MP3_HEADER = b"ID3\x03\x00\x00\x00\x00\x00\x00"
+
+
+def fake_translation(text, target):
+    return "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+
+
+def fake_mp3(text, lang):
+    return MP3_HEADER + hashlib.sha256(f"{lang}:{text}".encode("utf-8")).digest() * 8
+
+
+class StandInServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, slow_rate=0.0, slow_latency=5.0,
+                 throttle_rate=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # Decide how this request behaves: (delay seconds, HTTP status to fail with or None)
+    def _plan(self):
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self._random.random() < self.slow_rate:
+                delay = self.slow_latency
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400, b"bad json", "text/plain")
+                delay, status = server._plan()
+                if delay:
+                    time.sleep(delay)
+                if status is not None:
+                    return self._reply(status, b"injected failure", "text/plain")
+                if self.path == "/translate":
+                    body = json.dumps({"translatedText": fake_translation(payload.get("text", ""), payload.get("target", "en"))})
+                    return self._reply(200, body.encode("utf-8"), "application/json")
+                if self.path == "/tts":
+                    return self._reply(200, fake_mp3(payload.get("text", ""), payload.get("lang", "en")), "audio/mpeg")
+                self._reply(404, b"not found", "text/plain")
+
+            def _reply(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = StandInServer(port=port)
+    print(f"Stand-in services at {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,111 @@
+import audioop
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from calibration import prepare_recognizer, update_from_silence
+from transcription import recognizer as default_recognizer, transcribe_best
+
+PRE_ROLL_SECONDS = 0.3  # Audio kept from before speech starts so the first word is not clipped
+END_SILENCE_SECONDS = 0.6  # Silence that ends an utterance
+MAX_UTTERANCE_SECONDS = 15  # Utterances are force-cut at this length
+SILENCE_UPDATE_SECONDS = 5.0  # Silence collected before it is folded into the calibration profile
+UTTERANCE_WORKERS = 3
+
+
+# Continuous microphone capture that cuts utterances with an energy-based VAD and
+# transcribes each one while capture carries on. on_update(transcript) is called
+# with the transcript so far, in utterance order, every time an utterance is recognized.
+class StreamingTranscriber:
+    def __init__(self, on_update, mic_index=None, language=None, recognizer=None,
+                 calibrate=True, end_silence_seconds=END_SILENCE_SECONDS,
+                 max_utterance_seconds=MAX_UTTERANCE_SECONDS, pre_roll_seconds=PRE_ROLL_SECONDS,
+                 recognize=transcribe_best):
+        self.on_update = on_update
+        self.mic_index = mic_index
+        self.language = language
+        self.recognizer = recognizer or default_recognizer
+        self.calibrate = calibrate
+        self.end_silence_seconds = end_silence_seconds
+        self.max_utterance_seconds = max_utterance_seconds
+        self.pre_roll_seconds = pre_roll_seconds
+        self.recognize = recognize
+        self._texts = []  # Recognized text per utterance, None while pending
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=UTTERANCE_WORKERS, thread_name_prefix="utterance")
+        self._futures = []
+
+    # Transcript of every utterance recognized so far, in order
+    def transcript(self):
+        with self._lock:
+            return " ".join(t for t in self._texts if t)
+
+    def _submit(self, frames, sample_rate, sample_width):
+        audio = sr.AudioData(b"".join(frames), sample_rate, sample_width)
+        with self._lock:
+            index = len(self._texts)
+            self._texts.append(None)
+        future = self._pool.submit(self.recognize, audio, self.language)
+        future.add_done_callback(lambda f: self._on_result(index, f))
+        self._futures.append(future)
+
+    def _on_result(self, index, future):
+        try:
+            text = future.result()[0]
+        except Exception as ex:
+            print(f"Utterance {index} failed: {ex}")
+            text = ""
+        with self._lock:
+            self._texts[index] = text
+        if text:
+            self.on_update(self.transcript())
+
+    # Feed frames through the VAD until stop_event is set; returns the final transcript
+    # once every captured utterance has been recognized.
+    def run(self, stop_event, source=None):
+        if source is None:
+            mic = sr.Microphone(device_index=self.mic_index) if self.mic_index is not None else sr.Microphone()
+            with mic as source:
+                return self.run(stop_event, source)
+
+        if self.calibrate:
+            prepare_recognizer(self.recognizer, source, self.mic_index)
+        seconds_per_frame = source.CHUNK / source.SAMPLE_RATE
+        silence = []
+        silence_update_frames = int(SILENCE_UPDATE_SECONDS / seconds_per_frame)
+        pre_roll = collections.deque(maxlen=max(1, int(self.pre_roll_seconds / seconds_per_frame)))
+        end_silence_frames = max(1, int(self.end_silence_seconds / seconds_per_frame))
+        max_frames = int(self.max_utterance_seconds / seconds_per_frame)
+        utterance = None
+        silent_frames = 0
+
+        try:
+            while not stop_event.is_set():
+                frame = source.stream.read(source.CHUNK)
+                if not frame:
+                    break
+                is_speech = audioop.rms(frame, source.SAMPLE_WIDTH) > self.recognizer.energy_threshold
+                if utterance is None:
+                    pre_roll.append(frame)
+                    if not is_speech and self.calibrate:
+                        silence.append(frame)
+                        if len(silence) >= silence_update_frames:
+                            update_from_silence(self.recognizer, self.mic_index, silence, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                            silence = []
+                    if is_speech:
+                        utterance = list(pre_roll)
+                        pre_roll.clear()
+                        silent_frames = 0
+                    continue
+                utterance.append(frame)
+                silent_frames = 0 if is_speech else silent_frames + 1
+                if silent_frames >= end_silence_frames or len(utterance) >= max_frames:
+                    self._submit(utterance, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    utterance = None
+            if utterance:
+                self._submit(utterance, source.SAMPLE_RATE, source.SAMPLE_WIDTH)  # Flush speech cut off by stop
+        finally:
+            self._pool.shutdown(wait=True)  # Let in-flight recognitions finish
+        return self.transcript()
@@ -0,0 +1,117 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import speech_recognition as sr
+
+from metrics import span
+from recognizers import get_router
+
+FAILED_TRANSCRIPTION = "Could not understand audio after multiple attempts"
+FAN_OUT = 3  # Recognition requests in flight per transcription
+DEADLINE = 20.0  # Seconds before we settle for the best result so far
+HEDGE_DELAY = 0.0  # Seconds between launching successive attempts (0 = all at once)
+MIN_CONFIDENCE = 0.8  # Return as soon as an attempt is at least this confident
+
+recognizer = sr.Recognizer()
+_attempt_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="recognize")
+
+
+# Decode audio once; accepts a WAV/AIFF/FLAC path, a file object or ready sr.AudioData
+def load_audio(audio):
+    if isinstance(audio, sr.AudioData):
+        return audio
+    with sr.AudioFile(audio) as source:
+        return recognizer.record(source)
+
+
+# One recognition attempt; returns (transcript, confidence) from the routed backend
+def recognize_attempt(audio_data, language=None):
+    with span("recognition", size=len(audio_data.frame_data)) as s:
+        try:
+            return get_router().recognize(audio_data, language)
+        except sr.UnknownValueError:
+            s.outcome = "no_speech"
+            raise
+
+
+# Early-exit policy: is this result good enough to stop waiting for the others?
+def is_acceptable(transcript, confidence, min_confidence=MIN_CONFIDENCE, min_tokens=None):
+    if not transcript:
+        return False
+    if confidence is not None and min_confidence is not None and confidence >= min_confidence:
+        return True
+    return min_tokens is not None and len(transcript.split()) >= min_tokens
+
+
+def _score(result):
+    transcript, confidence = result
+    return (confidence if confidence is not None else 0.0, len(transcript.split()))
+
+
+# Run hedged, concurrent recognition attempts over audio decoded once.
+# Returns (transcript, confidence) of the best attempt, or ("", None) if none succeeded.
+# Stops as soon as an attempt passes is_acceptable, when all attempts finish, at the
+# deadline, or when cancel_event is set.
+def transcribe_best(audio, language=None, fan_out=FAN_OUT, deadline=DEADLINE, hedge_delay=HEDGE_DELAY,
+                    min_confidence=MIN_CONFIDENCE, min_tokens=None, cancel_event=None,
+                    recognize=recognize_attempt):
+    audio_data = load_audio(audio)
+    start = time.monotonic()
+    pending = set()
+    launched = 0
+    best = ("", None)
+
+    def launch():
+        nonlocal launched
+        launched += 1
+        print(f"Attempt {launched} to transcribe...")
+        pending.add(_attempt_executor.submit(recognize, audio_data, language))
+
+    launch()
+    try:
+        while pending or launched < fan_out:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            now = time.monotonic()
+            if now - start >= deadline:
+                print("Transcription deadline reached.")
+                break
+            while launched < fan_out and now - start >= launched * hedge_delay:
+                launch()
+            next_launch = start + launched * hedge_delay if launched < fan_out else float("inf")
+            timeout = max(0.0, min(start + deadline, next_launch) - now)
+            if not pending:  # wait() returns at once on an empty set; sleep until the next launch
+                if cancel_event is not None:
+                    cancel_event.wait(timeout)
+                else:
+                    time.sleep(timeout)
+                continue
+            done, _ = wait(pending, timeout=min(timeout, 0.1), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                try:
+                    result = future.result()
+                except sr.UnknownValueError:
+                    print("Could not understand audio.")
+                    continue
+                except sr.RequestError as e:
+                    print(f"Recognizer error: {e}")
+                    continue
+                except Exception as ex:
+                    print(f"Recognition failed: {ex}")
+                    continue
+                print(f"Transcription result: {result[0]}")  # Log the result for debugging
+                if _score(result) > _score(best):
+                    best = result
+                if is_acceptable(result[0], result[1], min_confidence, min_tokens):
+                    return result
+        return best
+    finally:
+        for future in pending:
+            future.cancel()  # Attempts already on the wire finish in the background and are ignored
+
+
+# Function to transcribe audio with concurrent, early-exit attempts and multilingual support
+def transcribe_audio_with_retries(audio_file_path, language=None, retries=FAN_OUT, cancel_event=None, **policy):
+    transcript, _ = transcribe_best(audio_file_path, language, fan_out=retries, cancel_event=cancel_event, **policy)
+    return transcript if transcript else FAILED_TRANSCRIPTION
@@ -0,0 +1,189 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from database import execute, fetchone
+from metrics import span
+
+MEMORY_CACHE_SIZE = 2048
+MEMORY_TTL = 6 * 60 * 60  # Seconds an entry is served from memory before re-checking disk
+DISK_TTL = 30 * 24 * 60 * 60  # Seconds before a persisted translation is fetched again (None = never)
+TRANSLATION_TIMEOUT = 60.0  # Longest a caller waits for a translation: the client's 30 s deadline plus queueing
+
+
+# Normalize text so trivially different inputs share one cache entry
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+# Bounded, thread-safe LRU map whose entries expire after a TTL
+class LRUCache:
+    def __init__(self, max_size=MEMORY_CACHE_SIZE, ttl=MEMORY_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Table behind the cache's disk tier; applied as a schema migration (history.HISTORY_MIGRATIONS)
+def create_translation_cache_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS translation_cache (
+        text TEXT NOT NULL,
+        source_lang TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        translated_text TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (text, source_lang, target_lang)
+    ) WITHOUT ROWID
+    ''')
+
+
+# Two-tier cache in front of GoogleTranslator: an in-process LRU backed by a
+# SQLite table, so repeated phrases skip the network and survive restarts.
+class TranslationCache:
+    def __init__(self, memory_size=MEMORY_CACHE_SIZE, memory_ttl=MEMORY_TTL, disk_ttl=DISK_TTL, translate_fn=None):
+        self.memory = LRUCache(memory_size, memory_ttl)
+        self.disk_ttl = disk_ttl
+        self.translate_fn = translate_fn or self._google_translate
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _google_translate(text, source, target):
+        from deep_translator import GoogleTranslator
+
+        return GoogleTranslator(source=source, target=target).translate(text)
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _load(self, key):
+        row = fetchone(
+            "SELECT translated_text, created_at FROM translation_cache WHERE text = ? AND source_lang = ? AND target_lang = ?",
+            key,
+        )
+        if row is None:
+            return None
+        if self.disk_ttl is not None and row[1] + self.disk_ttl < time.time():
+            return None
+        return row[0]
+
+    def _store(self, key, translated_text):
+        execute(
+            "INSERT OR REPLACE INTO translation_cache (text, source_lang, target_lang, translated_text, created_at) VALUES (?, ?, ?, ?, ?)",
+            key + (translated_text, time.time()),
+        )
+
+    def make_key(self, text, source="auto", target="en"):
+        return (normalize_text(text), source, target)
+
+    # Cached translation for a key from memory or disk, or None (hits are counted)
+    def lookup(self, key):
+        translated_text = self.memory.get(key)
+        if translated_text is not None:
+            self._count("memory_hits")
+            return translated_text
+
+        translated_text = self._load(key)
+        if translated_text is not None:
+            self._count("disk_hits")
+            self.memory.put(key, translated_text)
+        return translated_text
+
+    # Remember a fresh translation in both tiers
+    def store(self, key, translated_text):
+        if translated_text:  # Never cache an empty/failed translation
+            self.memory.put(key, translated_text)
+            self._store(key, translated_text)
+
+    def record_miss(self):
+        self._count("misses")
+
+    def translate(self, text, source="auto", target="en"):
+        key = self.make_key(text, source, target)
+        if not key[0]:
+            return text
+
+        translated_text = self.lookup(key)
+        if translated_text is not None:
+            return translated_text
+
+        self.record_miss()
+        translated_text = self.translate_fn(key[0], source, target)
+        self.store(key, translated_text)
+        return translated_text
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
+
+    def clear(self):
+        self.memory.clear()
+        execute("DELETE FROM translation_cache")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Get the process-wide translation cache
+def get_translation_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranslationCache()
+    return _cache
+
+
+# Start translating text through the shared cache and return a Future for the result;
+# misses are coalesced and batched by the translation service
+def translate_async(text, source="auto", target="en"):
+    from translation_service import submit_translation
+
+    return submit_translation(text, source, target)
+
+
+# Translate text through the shared cache, waiting for the result
+def cached_translate(text, source="auto", target="en"):
+    with span("translation", size=len(text)):
+        return translate_async(text, source, target).result(TRANSLATION_TIMEOUT)
@@ -0,0 +1,192 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from clients import get_service_client, run_sync
+from language_id import detect_language
+from metrics import span
+from translation_cache import get_translation_cache
+
+COALESCE_WINDOW = 0.02  # Seconds to wait for more texts before sending a batch
+MAX_BATCH_CHARS = 4500  # Google rejects single requests over 5000 characters
+MAX_BATCH_TEXTS = 50  # A full batch is sent without waiting for the window
+BATCH_SEPARATOR = "\n"
+WORKERS = 4
+
+
+def _google_client(source, target):
+    from deep_translator import GoogleTranslator
+
+    return GoogleTranslator(source=source, target=target)
+
+
+# Coalescing front end for the translator.
+# Texts submitted within COALESCE_WINDOW for the same (source, target) pair are sent
+# together, identical texts already in flight share one request, and one client is
+# reused per language pair. Results go through the two-tier translation cache.
+# With source="auto" the upstream detects one language for a whole joined request, so
+# those texts are only joined with others detected locally as the same language.
+class TranslationService:
+    def __init__(self, cache=None, window=COALESCE_WINDOW, max_batch_chars=MAX_BATCH_CHARS,
+                 max_batch_texts=MAX_BATCH_TEXTS, workers=WORKERS, client_factory=None, service_client=None):
+        self.cache = cache or get_translation_cache()
+        self.service_client = service_client or get_service_client("translate")  # Rate limits, retries, deadlines
+        self.window = window
+        self.max_batch_chars = max_batch_chars
+        self.max_batch_texts = max_batch_texts
+        self.client_factory = client_factory or _google_client
+        self.requests_sent = 0
+        self.texts_sent = 0
+        self.deduplicated = 0
+        self._clients = {}
+        self._pending = {}  # (source, target, group) -> texts waiting for the window to close
+        self._timers = {}
+        self._inflight = {}  # cache key -> Future shared by every caller asking for it
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+
+    # One translator client per language pair, created on first use
+    def client(self, source, target):
+        with self._lock:
+            client = self._clients.get((source, target))
+            if client is None:
+                client = self._clients[(source, target)] = self.client_factory(source, target)
+            return client
+
+    # Queue a translation and return a Future for the translated text
+    def submit(self, text, source="auto", target="en"):
+        key = self.cache.make_key(text, source, target)
+        future = Future()
+        if not key[0]:
+            future.set_result(text)
+            return future
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        pair = (source, target)
+        batch = pair + (self._group(key[0], source),)
+        flush_now = False
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                self.deduplicated += 1
+                return existing
+            cached = self.cache.memory.get(key)  # Finished between the lookup and taking the lock
+            if cached is not None:
+                future.set_result(cached)
+                return future
+            self._inflight[key] = future
+            pending = self._pending.setdefault(batch, [])
+            pending.append(key[0])
+            if len(pending) >= self.max_batch_texts:
+                flush_now = True
+            elif len(pending) == 1:
+                timer = threading.Timer(self.window, self._flush, (batch,))
+                timer.daemon = True
+                self._timers[batch] = timer
+                timer.start()
+        if flush_now:
+            self._flush(batch)
+        return future
+
+    # Texts may share a joined request only within a group: the explicit source
+    # language, or for "auto" the language detected here (None = never joined)
+    @staticmethod
+    def _group(text, source):
+        return detect_language(text) if source == "auto" else source
+
+    def translate(self, text, source="auto", target="en", timeout=None):
+        return self.submit(text, source, target).result(timeout)
+
+    def _flush(self, batch):
+        with self._lock:
+            texts = self._pending.pop(batch, [])
+            timer = self._timers.pop(batch, None)
+        if timer is not None:
+            timer.cancel()
+        pair, joinable = batch[:2], batch[2] is not None
+        for texts in self._split(texts):
+            self._pool.submit(self._translate_batch, pair, texts, joinable)
+
+    # Cut texts into batches that fit in one request
+    def _split(self, texts):
+        batch, size = [], 0
+        for text in texts:
+            if batch and size + len(text) + len(BATCH_SEPARATOR) > self.max_batch_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text) + len(BATCH_SEPARATOR)
+        if batch:
+            yield batch
+
+    # Translate a batch: one joined request when the texts may be joined and the
+    # separator survives the round trip, otherwise concurrent requests, one per text.
+    # Returns a result or exception per text.
+    def _send(self, pair, texts, joinable=True):
+        with span("translation_request", size=sum(len(text) for text in texts)):
+            return self._send_batch(pair, texts, joinable)
+
+    def _send_batch(self, pair, texts, joinable=True):
+        client = self.client(*pair)
+        api = self.service_client
+        if joinable and len(texts) > 1 and all(BATCH_SEPARATOR not in text for text in texts):
+            self._count(1, len(texts))
+            joined = api.call_sync(client.translate, BATCH_SEPARATOR.join(texts)) or ""
+            parts = joined.split(BATCH_SEPARATOR)
+            if len(parts) == len(texts):
+                return [part.strip() for part in parts]
+            print("Batched translation lost its separators; retrying per text.")
+        self._count(len(texts), len(texts))
+        return run_sync(api.call_many(client.translate, texts))
+
+    def _count(self, requests, texts):
+        with self._lock:
+            self.requests_sent += requests
+            self.texts_sent += texts
+
+    def _translate_batch(self, pair, texts, joinable=True):
+        try:
+            results = self._send(pair, texts, joinable)
+        except Exception as ex:
+            results = [ex] * len(texts)
+        for text, result in zip(texts, results):
+            key = (text,) + pair
+            failed = isinstance(result, BaseException)
+            try:
+                if not failed:
+                    self.cache.record_miss()
+                    self.cache.store(key, result)  # Before leaving _inflight, so no caller misses both
+            except Exception as ex:
+                print(f"Could not cache translation: {ex}")  # The caller still gets the result
+            finally:
+                with self._lock:
+                    future = self._inflight.pop(key, None)
+                if future is not None and not future.cancelled():
+                    if failed:
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    def stats(self):
+        return {"requests_sent": self.requests_sent, "texts_sent": self.texts_sent, "deduplicated": self.deduplicated}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+# Get the process-wide translation service
+def get_translation_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TranslationService()
+    return _service
+
+
+# Queue a translation on the shared service; returns a Future
+def submit_translation(text, source="auto", target="en"):
+    return get_translation_service().submit(text, source, target)
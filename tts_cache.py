@@ -0,0 +1,158 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = "tts_cache"
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+
+# Cache key for a synthesized phrase
+def tts_key(text, lang):
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+# On-disk, content-addressed cache of synthesized speech.
+# Files are named by the hash of (text, lang), written atomically through a
+# temp file + rename, and evicted least-recently-used once the byte budget is
+# exceeded. Concurrent requests for the same phrase share one synthesis.
+class TTSCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, extension=".mp3"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> threading.Event for synthesis in progress
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    # Rebuild the LRU index from what is already on disk, oldest access first
+    def _scan(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp"):
+                try:
+                    os.remove(path)  # Left over from an interrupted write
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(self.extension):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    # Drop least recently used files until the cache fits its budget (caller holds the lock or is __init__)
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _touch(self, key):
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))  # Persist recency for the next _scan
+        except OSError:
+            pass
+
+    # Return the cached file for (text, lang), or None
+    def get(self, text, lang):
+        key = tts_key(text, lang)
+        with self._lock:
+            if key in self._entries and os.path.exists(self._path(key)):
+                self._touch(key)
+                self.hits += 1
+                return self._path(key)
+        return None
+
+    # Return the path of the audio for (text, lang), calling synthesize(path) to
+    # create it on a miss. synthesize must write the complete file to the path it is given.
+    def get_or_create(self, text, lang, synthesize):
+        key = tts_key(text, lang)
+        path = self._path(key)
+        while True:
+            with self._lock:
+                if key in self._entries and os.path.exists(path):
+                    self._touch(key)
+                    self.hits += 1
+                    return path
+                waiter = self._in_flight.get(key)
+                if waiter is None:
+                    # This thread owns the synthesis for this key
+                    self._in_flight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            waiter.wait()  # Another thread is synthesizing the same phrase; reuse its result
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+            os.close(fd)
+            try:
+                synthesize(tmp_path)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            size = os.path.getsize(path)
+            with self._lock:
+                self._total_bytes += size - self._entries.pop(key, 0)  # A vanished file is re-created in place
+                self._entries[key] = size
+                self._evict()
+            return path
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    # Like get_or_create, but synthesize() returns the audio bytes and the bytes are
+    # returned too, so a fresh synthesis can be played from memory straight away
+    def get_or_create_bytes(self, text, lang, synthesize):
+        fresh = []
+
+        def write(path):
+            fresh.append(synthesize())
+            with open(path, "wb") as f:
+                f.write(fresh[0])
+
+        path = self.get_or_create(text, lang, write)
+        if fresh:
+            return fresh[0]
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:  # Evicted between lookup and read
+            return synthesize()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._total_bytes}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+# Get the process-wide TTS cache
+def get_tts_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache()
+    return _cache
@@ -0,0 +1,221 @@
+import io
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from clients import get_service_client
+from metrics import span
+from tts_cache import get_tts_cache
+
+LOOKAHEAD = 2  # Sentences synthesized ahead of the one playing
+PUNKT_RESOURCES = ("tokenizers/punkt_tab", "tokenizers/punkt")
+
+_synth_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-synth")
+pygame = None  # Imported, with the mixer started, on first playback; see init_mixer()
+_mixer_lock = threading.Lock()
+_punkt_state = None  # None = not checked yet, False = missing, True = available
+_punkt_lock = threading.Lock()
+_active_stop = None  # Stop event of the stream now playing; set by stop_playback()
+_active_lock = threading.Lock()
+
+
+# Import pygame and start the audio mixer the first time something is played
+def init_mixer():
+    global pygame
+    with _mixer_lock:
+        if pygame is None:
+            import pygame as pygame_module
+            pygame_module.mixer.init()
+            pygame = pygame_module
+    return pygame
+
+
+# Stop playback, and end the stream now playing so it loads no further sentences,
+# without starting the mixer if nothing has played yet
+def stop_playback():
+    with _active_lock:
+        if _active_stop is not None:
+            _active_stop.set()
+    if pygame is not None:
+        pygame.mixer.music.stop()
+
+
+def _track_end_event():
+    return pygame.USEREVENT + 1
+
+
+def _download_punkt():
+    global _punkt_state
+    import nltk
+
+    try:
+        for resource in PUNKT_RESOURCES:
+            nltk.download(resource.split("/")[1], quiet=True)
+        _punkt_state = True
+    except Exception as ex:
+        print(f"Could not download punkt data: {ex}")
+
+
+# Is punkt available in the local NLTK data? Only looks on disk; if it is missing,
+# one background download is started and punctuation splitting is used meanwhile.
+def punkt_available():
+    global _punkt_state
+    with _punkt_lock:
+        if _punkt_state is None:
+            import nltk
+
+            _punkt_state = False
+            for resource in PUNKT_RESOURCES:
+                try:
+                    nltk.data.find(resource)
+                    _punkt_state = True
+                    break
+                except LookupError:
+                    pass
+            if not _punkt_state:
+                threading.Thread(target=_download_punkt, daemon=True).start()
+    return _punkt_state
+
+
+# Split text into sentences with NLTK's punkt model, falling back to punctuation
+def split_sentences(text):
+    sentences = None
+    if punkt_available():
+        import nltk
+
+        try:
+            sentences = nltk.sent_tokenize(text)
+        except LookupError:  # punkt data not available
+            pass
+    if sentences is None:
+        sentences = re.split(r"(?<=[.!?।。])\s+", text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def _gtts_mp3(text, lang):
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+# Synthesize speech into memory with gTTS and return the mp3 bytes; the call is
+# rate limited, retried and bounded by a deadline through the "tts" service client
+def synthesize_mp3(text, lang):
+    with span("tts_synthesis") as s:
+        audio = get_service_client("tts").call_sync(_gtts_mp3, text, lang)
+        s.size = len(audio)
+        return audio
+
+
+# Synthesize one chunk through the TTS cache and return the mp3 bytes
+def synthesize_chunk(text, lang):
+    return get_tts_cache().get_or_create_bytes(text, lang, lambda: synthesize_mp3(text, lang))
+
+
+# Wrap audio bytes so pygame can play them without touching the filesystem
+def as_playable(audio):
+    return io.BytesIO(audio) if isinstance(audio, bytes) else audio
+
+
+# Enable pygame's event queue so we can sleep on the mixer's end-of-track event
+def _enable_end_events():
+    try:
+        if not pygame.display.get_init():
+            pygame.display.init()  # Needed for the event queue; does not open a window
+        pygame.mixer.music.set_endevent(_track_end_event())
+        return True
+    except pygame.error:
+        return False
+
+
+# Block until the current track finishes, sleeping on the end event
+def _wait_for_track_end(stop_event):
+    while not stop_event.is_set():
+        event = pygame.event.wait(250)
+        if event.type == _track_end_event():
+            return
+        if event.type == pygame.NOEVENT and not pygame.mixer.music.get_busy():
+            return  # Stopped from elsewhere (e.g. a new text_to_speech call)
+
+
+# Sleep-poll fallback for when the event queue is not available
+def _wait_until_idle(stop_event, poll_interval=0.05):
+    while pygame.mixer.music.get_busy() and not stop_event.is_set():
+        time.sleep(poll_interval)
+
+
+# Speak text sentence by sentence: chunk N+1 is synthesized in the background
+# while chunk N plays, and chunks are handed to pygame's music queue, so the
+# first audio starts as soon as the first sentence is ready.
+# The stream ends early when stop_event is set (pass a job's cancel_event) or when
+# stop_playback() is called, which also happens when the next text_to_speech starts.
+def stream_text_to_speech(text, lang, synthesize=synthesize_chunk, stop_event=None):
+    global _active_stop
+    sentences = split_sentences(text)
+    if not sentences:
+        return
+
+    stop_event = stop_event or threading.Event()
+    with _active_lock:
+        _active_stop = stop_event
+    try:
+        with span("playback", size=len(sentences)):
+            _stream_sentences(sentences, lang, synthesize, stop_event)
+    finally:
+        with _active_lock:
+            if _active_stop is stop_event:
+                _active_stop = None
+                if stop_event.is_set() and pygame is not None:
+                    pygame.mixer.music.stop()  # Cancelled through the job; a newer stream is never cut off
+
+
+# Start a chunk now, dropping any end event left over from the previous one
+def _play_now(audio, use_events):
+    if use_events:
+        pygame.event.clear(_track_end_event())
+    pygame.mixer.music.load(audio, "mp3")
+    pygame.mixer.music.play()
+
+
+def _stream_sentences(sentences, lang, synthesize, stop_event):
+    futures = [_synth_executor.submit(synthesize, s, lang) for s in sentences[:LOOKAHEAD + 1]]
+    init_mixer()
+    use_events = _enable_end_events()
+
+    try:
+        first_audio = as_playable(futures[0].result())
+        if stop_event.is_set():
+            return
+        _play_now(first_audio, use_events)
+        for index in range(1, len(sentences)):
+            if index + LOOKAHEAD < len(sentences):
+                futures.append(_synth_executor.submit(synthesize, sentences[index + LOOKAHEAD], lang))
+            next_audio = as_playable(futures[index].result())
+            if stop_event.is_set():
+                return
+            if not use_events:
+                _wait_until_idle(stop_event)
+                if stop_event.is_set():
+                    return
+                _play_now(next_audio, use_events)
+                continue
+            if pygame.mixer.music.get_busy():
+                pygame.mixer.music.queue(next_audio, "mp3")
+                if pygame.mixer.music.get_busy():
+                    _wait_for_track_end(stop_event)  # Current chunk ended; the queued one is now playing
+                    continue
+            # Synthesis fell behind playback, or the chunk ended just before it could be
+            # queued and the queued one was dropped; start it directly
+            _play_now(next_audio, use_events)
+        if use_events:
+            _wait_for_track_end(stop_event)
+        else:
+            _wait_until_idle(stop_event)
+    finally:
+        for future in futures:
+            future.cancel()
+        if use_events:
+            pygame.mixer.music.set_endevent()